@@ -0,0 +1,120 @@
+# stalcraft_bot/benchmarks/bench_matcher.py
+#
+# Сравнение FilterIndex с прежним вложенным циклом «лоты × фильтры».
+# Запуск из корня проекта: python -m benchmarks.bench_matcher
+
+import random
+import time
+
+from services.matcher import FilterIndex
+
+LOTS = 200
+FILTER_COUNTS = (10, 100, 1000)
+REPEATS = 20
+
+
+def make_filters(count):
+    filters = []
+    for i in range(count):
+        if i % 2:
+            filters.append(
+                {
+                    "user_id": i,
+                    "type": "item",
+                    "price": random.randint(1_000, 100_000),
+                    "min_count": random.randint(1, 20),
+                }
+            )
+        else:
+            rarity = random.randint(0, 5)
+            f = {
+                "user_id": i,
+                "type": "artifact",
+                "price": random.randint(1_000, 100_000),
+                "min_count": 1,
+                "rarity": rarity,
+            }
+            if random.random() < 0.5:
+                low = 100 + rarity * 10 if rarity else 0
+                f["min_percent"] = low
+                f["max_percent"] = low + 5
+            filters.append(f)
+    return filters
+
+
+def make_lots(count):
+    return [
+        {
+            "price_per_unit": random.randint(500, 150_000),
+            "amount": random.randint(1, 30),
+            "rarity": random.randint(0, 5),
+            "percent": round(random.uniform(0, 150), 2),
+        }
+        for _ in range(count)
+    ]
+
+
+def nested_loop(filters, lots):
+    matched = 0
+    for lot in lots:
+        for filter_ in filters:
+            if filter_["type"] == "item":
+                if (
+                    lot["price_per_unit"] > filter_["price"]
+                    or lot["amount"] < filter_["min_count"]
+                ):
+                    continue
+            else:
+                if lot["rarity"] != filter_["rarity"]:
+                    continue
+                if (
+                    filter_.get("min_percent") is not None
+                    and filter_.get("max_percent") is not None
+                ):
+                    if not (
+                        filter_["min_percent"]
+                        <= lot["percent"]
+                        <= filter_["max_percent"]
+                    ):
+                        continue
+                if lot["price_per_unit"] > filter_["price"]:
+                    continue
+            matched += 1
+    return matched
+
+
+def indexed(filters, lots):
+    index = FilterIndex(filters)
+    matched = 0
+    for lot in lots:
+        for _ in index.match(
+            lot["price_per_unit"], lot["amount"], lot["rarity"], lot["percent"]
+        ):
+            matched += 1
+    return matched
+
+
+def bench(func, filters, lots):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func(filters, lots)
+    return (time.perf_counter() - start) / REPEATS * 1000, result
+
+
+def main():
+    random.seed(42)
+    lots = make_lots(LOTS)
+    print(f"{'filters':>8} {'nested, ms':>12} {'index, ms':>12} {'speedup':>8}")
+    for count in FILTER_COUNTS:
+        filters = make_filters(count)
+        t_nested, m_nested = bench(nested_loop, filters, lots)
+        t_index, m_index = bench(indexed, filters, lots)
+        assert m_nested == m_index, (m_nested, m_index)
+        print(
+            f"{count:>8} {t_nested:>12.2f} {t_index:>12.2f} "
+            f"{t_nested / t_index:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
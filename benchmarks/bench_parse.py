@@ -0,0 +1,70 @@
+# stalcraft_bot/benchmarks/bench_parse.py
+#
+# Разбор страницы из 200 лотов: json + dict против parse_lots (Lot + orjson).
+# Запуск из корня проекта: python -m benchmarks.bench_parse
+
+import json
+import random
+import time
+import tracemalloc
+
+from services.lot_parser import loads, parse_lots
+
+LOTS = 200
+REPEATS = 200
+
+
+def make_page():
+    lots = []
+    for i in range(LOTS):
+        lots.append(
+            {
+                "itemId": "y3nmw",
+                "amount": random.randint(1, 100),
+                "startPrice": random.randint(1_000, 100_000),
+                "currentPrice": random.randint(1_000, 100_000),
+                "buyoutPrice": random.randint(1_000, 200_000),
+                "startTime": f"2026-10-18T10:{i % 60:02d}:00Z",
+                "endTime": f"2026-10-19T10:{i % 60:02d}:00Z",
+                "additional": {
+                    "qlt": random.randint(0, 5),
+                    "stats_random": random.random(),
+                    "ptn": random.randint(0, 15),
+                    "md_k": "core",
+                    "bonus_properties": [f"prop_{j}" for j in range(6)],
+                    "stats": {f"stat_{j}": random.random() for j in range(10)},
+                },
+            }
+        )
+    return json.dumps({"total": LOTS, "lots": lots}).encode()
+
+
+def bench(func, content):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        func(content)
+    elapsed = (time.perf_counter() - start) / REPEATS * 1000
+
+    tracemalloc.start()
+    result = func(content)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, retained / 1024
+
+
+def main():
+    random.seed(42)
+    content = make_page()
+    print(f"parser: {loads.__module__}, page: {len(content) / 1024:.0f} KB")
+    print(f"{'':>14} {'ms/page':>8} {'kept, KB':>9}")
+    for name, func in (
+        ("json + dict", lambda c: json.loads(c)["lots"]),
+        ("parse_lots", parse_lots),
+    ):
+        elapsed, retained = bench(func, content)
+        print(f"{name:>14} {elapsed:>8.2f} {retained:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
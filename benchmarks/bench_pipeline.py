@@ -0,0 +1,299 @@
+# stalcraft_bot/benchmarks/bench_pipeline.py
+#
+# Офлайн-прогон всего пайплайна опроса: poll_item -> fetch_lots (HTTP) ->
+# process_auction_data -> processed_lots -> notifier -> «бот». API, Mongo и
+# Telegram заменены заглушками из benchmarks/stubs.py, лимиты API и Telegram
+# сняты — меряем сам код, а не чужие ограничения.
+#
+# Страницы лотов — записанные ответы /lots (см. benchmarks/record_pages.py)
+# или синтетика, если --pages не задан.
+# Запуск из корня проекта:
+#   python -m benchmarks.bench_pipeline [--pages DIR] [--filters 10,100,1000]
+#                                       [--sweeps N] [--items N]
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import handlers.auction_check as auction_check
+import repositories.processed_lots
+import repositories.users
+import services.notifier
+import services.stalcraft_api as stalcraft_api
+from benchmarks.stubs import FakeBot, MemoryCollection, StubApi, make_pages
+from services.latency import detection_latency
+from services.stalcraft_api import StalcraftAuth
+from services.user_cache import invalidate_valid_user_ids
+
+FILTER_COUNTS = (10, 100, 1000, 10_000)
+SWEEPS = 5  # холодный проход и SWEEPS-1 с новыми лотами, потом повтор старых
+ITEMS = 20
+LOTS_PER_ITEM = 200
+FILTERS_PER_USER = 5
+UNLIMITED = 10**9
+
+
+def load_pages(path):
+    """Каталог <item_id>.json с сырыми ответами /lots."""
+    pages = {}
+    for file in sorted(Path(path).glob("*.json")):
+        pages[file.stem] = json.loads(file.read_text(encoding="utf-8"))["lots"]
+    return pages
+
+
+def make_filters(count, item_ids, rng):
+    filters = []
+    for i in range(count):
+        item_id = item_ids[i % len(item_ids)]
+        f = {
+            "_id": i,
+            "user_id": i // FILTERS_PER_USER,
+            "item_id": item_id,
+            "name": f"item {item_id}",
+            "price": rng.randint(1_000, 100_000),
+            "min_count": 1,
+            "notify": True,
+        }
+        if i % 2:
+            f["type"] = "item"
+            f["min_count"] = rng.randint(1, 10)
+        else:
+            rarity = rng.randint(0, 5)
+            f["type"] = "artifact"
+            f["rarity"] = rarity
+            if rng.random() < 0.5:
+                low = 100 + rarity * 10 if rarity else 0
+                f["min_percent"] = low
+                f["max_percent"] = low + 5
+        filters.append(f)
+    return filters
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def latency_ms(stage):
+    values = [
+        seconds
+        for (_, key_stage), samples in detection_latency.samples.items()
+        if key_stage == stage
+        for seconds in samples
+    ]
+    return [percentile(values, p) * 1000 if values else None for p in (50, 99)]
+
+
+class Counters:
+    """Сколько лотов и проверок «лот × фильтр» прошло через process_auction_data."""
+
+    def __init__(self):
+        self.lots = 0
+        self.checks = 0
+
+    def wrap(self, process_auction_data):
+        async def counted(tracked_items_for_id, lots, *args, **kwargs):
+            self.lots += len(lots)
+            self.checks += len(lots) * len(tracked_items_for_id)
+            return await process_auction_data(
+                tracked_items_for_id, lots, *args, **kwargs
+            )
+
+        return counted
+
+
+async def drain(notifier):
+    while notifier.qsize() or notifier.pending:
+        await asyncio.sleep(0.001)
+
+
+async def sweep(by_item, notifier):
+    semaphore = asyncio.Semaphore(auction_check.POLL_WORKERS)
+
+    async def poll(item_id, items):
+        async with semaphore:
+            await auction_check.poll_item(item_id, items, notifier)
+
+    # «[INFO] Notification sent» на каждое сообщение — не в таблицу,
+    # а ошибки опроса показываем
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        start = time.perf_counter()
+        await asyncio.gather(*(poll(item_id, items) for item_id, items in by_item))
+        elapsed = time.perf_counter() - start
+        await drain(notifier)
+    for line in log.getvalue().splitlines():
+        if line.startswith("[ERROR]"):
+            print(line)
+    return elapsed
+
+
+async def run_scenario(stub, filter_count, item_ids, sweeps, counters, rng):
+    filters = make_filters(filter_count, item_ids, rng)
+    by_item = {}
+    for f in filters:
+        by_item.setdefault(f["item_id"], []).append(f)
+    # Предметы без фильтров не опрашиваются и в боте
+    by_item = list(by_item.items())
+
+    processed = MemoryCollection(("item_id", "start_time", "end_time"))
+    users = MemoryCollection()
+    for user_id in {f["user_id"] for f in filters}:
+        users.docs[user_id] = {"user_id": user_id}
+    repositories.processed_lots.processed_lots = processed
+    repositories.users.users_collection = users
+    invalidate_valid_user_ids()
+    auction_check.watermarks.clear()
+    auction_check.ending_state.clear()
+
+    bot = FakeBot()
+    notifier = services.notifier.Notifier()
+    notifier.global_limiter.set_rate(UNLIMITED, UNLIMITED)
+    notifier.start(bot)
+
+    rows = []
+    try:
+        # Последний проход — повтор той же эпохи: все лоты уже виденные
+        for number in range(sweeps + 1):
+            repeat = number == sweeps
+            if not repeat:
+                stub.new_epoch()
+            detection_latency.samples.clear()
+            detection_latency.names.clear()
+            for collection in (processed, users):
+                collection.reset_counters()
+            stub.requests = 0
+            counters.lots = counters.checks = 0
+            sent_before = bot.sent
+
+            elapsed = await sweep(by_item, notifier)
+
+            kind = "repeat" if repeat else ("cold" if number == 0 else "new")
+            rows.append(
+                {
+                    "kind": kind,
+                    "seconds": elapsed,
+                    "lots": counters.lots,
+                    "checks": counters.checks,
+                    "db_round_trips": processed.round_trips + users.round_trips,
+                    "db_writes": processed.writes + users.writes,
+                    "api_requests": stub.requests,
+                    "sent": bot.sent - sent_before,
+                    "match_ms": latency_ms("match"),
+                    "delivered_ms": latency_ms("delivered"),
+                }
+            )
+    finally:
+        await notifier.stop()
+    return rows
+
+
+def average(rows):
+    """Средняя строка по проходам с новыми лотами."""
+    if len(rows) == 1:
+        return rows[0]
+    result = {"kind": f"new x{len(rows)}"}
+    for key in (
+        "seconds",
+        "lots",
+        "checks",
+        "db_round_trips",
+        "db_writes",
+        "api_requests",
+        "sent",
+    ):
+        result[key] = sum(row[key] for row in rows) / len(rows)
+    for key in ("match_ms", "delivered_ms"):
+        pairs = [row[key] for row in rows if row[key][0] is not None]
+        result[key] = [
+            sum(p[i] for p in pairs) / len(pairs) if pairs else None for i in (0, 1)
+        ]
+    return result
+
+
+def format_ms(pair):
+    return " ".join(
+        f"{value:>7.1f}" if value is not None else f"{'-':>7}" for value in pair
+    )
+
+
+def print_row(filter_count, row):
+    seconds = row["seconds"] or 1e-9
+    print(
+        f"{filter_count:>7} {row['kind']:>8} {row['lots'] / seconds:>9.0f} "
+        f"{row['checks'] / seconds:>11.0f} {row['db_round_trips']:>6.0f} "
+        f"{row['db_writes']:>7.0f} {row['api_requests']:>5.0f} "
+        f"{row['sent']:>6.0f} {format_ms(row['match_ms'])} "
+        f"{format_ms(row['delivered_ms'])}"
+    )
+
+
+async def run(args):
+    rng = random.Random(42)
+    if args.pages:
+        pages = load_pages(args.pages)
+    else:
+        item_ids = [f"bench{i:02d}" for i in range(args.items)]
+        pages = make_pages(item_ids, LOTS_PER_ITEM, rng)
+    item_ids = sorted(pages)
+
+    stub = StubApi(pages)
+    await stub.start()
+    stalcraft_api.API_BASE_URL = stub.url
+    stalcraft_api.AUTH_URL = f"{stub.url}/oauth/token"
+    stalcraft_api.init_http_client()
+    for credential in StalcraftAuth.credentials:
+        credential.limiter.set_rate(UNLIMITED, UNLIMITED)
+    services.notifier.PER_CHAT_RATE = UNLIMITED
+
+    counters = Counters()
+    auction_check.process_auction_data = counters.wrap(
+        auction_check.process_auction_data
+    )
+
+    print(
+        f"items={len(item_ids)} sweeps={args.sweeps} "
+        f"({datetime.now(timezone.utc):%Y-%m-%d %H:%M} UTC)"
+    )
+    print(
+        f"{'filters':>7} {'sweep':>8} {'lots/s':>9} {'checks/s':>11} "
+        f"{'db rt':>6} {'db wr':>7} {'api':>5} {'sent':>6} "
+        f"{'match p50/p99':>15} {'deliv p50/p99':>15}"
+    )
+    try:
+        for filter_count in args.filters:
+            rows = await run_scenario(
+                stub, filter_count, item_ids, args.sweeps, counters, rng
+            )
+            print_row(filter_count, rows[0])
+            if len(rows) > 2:
+                print_row(filter_count, average(rows[1:-1]))
+            print_row(filter_count, rows[-1])
+    finally:
+        await stalcraft_api.close_http_client()
+        await stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", help="каталог с записанными ответами /lots")
+    parser.add_argument(
+        "--filters",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=list(FILTER_COUNTS),
+    )
+    parser.add_argument("--sweeps", type=int, default=SWEEPS)
+    parser.add_argument("--items", type=int, default=ITEMS)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# stalcraft_bot/benchmarks/record_pages.py
+#
+# Запись страниц лотов для bench_pipeline: по файлу <item_id>.json с сырым
+# ответом /lots (до 200 самых новых лотов). Нужны API_CREDENTIALS из .env.
+# Запуск из корня проекта:
+#   python -m benchmarks.record_pages DIR item_id [item_id ...]
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from config import API_BASE_URL
+from services.stalcraft_api import (
+    StalcraftAuth,
+    close_http_client,
+    get_http_client,
+    init_http_client,
+)
+
+LIMIT = 200
+
+
+async def record(path, item_ids):
+    path.mkdir(parents=True, exist_ok=True)
+    init_http_client()
+    try:
+        for item_id in item_ids:
+            credential = StalcraftAuth.pick()
+            await credential.limiter.acquire()
+            resp = await get_http_client().get(
+                f"{API_BASE_URL}/ru/auction/{item_id}/lots",
+                headers={"Authorization": f"Bearer {await credential.get_token()}"},
+                params={
+                    "additional": "true",
+                    "limit": LIMIT,
+                    "sort": "time_created",
+                    "order": "desc",
+                },
+            )
+            resp.raise_for_status()
+            # Как есть, без разбора: заглушка отдаёт ровно то, что вернул API
+            (path / f"{item_id}.json").write_bytes(resp.content)
+            print(f"[INFO] {item_id}: {len(resp.json()['lots'])} lots")
+    finally:
+        await close_http_client()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", type=Path)
+    parser.add_argument("item_ids", nargs="+")
+    args = parser.parse_args()
+    asyncio.run(record(args.path, args.item_ids))
+
+
+if __name__ == "__main__":
+    main()
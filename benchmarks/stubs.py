@@ -0,0 +1,277 @@
+# stalcraft_bot/benchmarks/stubs.py
+#
+# Заглушки внешних сервисов для bench_pipeline: API Stalcraft (локальный HTTP),
+# Mongo (коллекции в памяти) и Telegram-бот.
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlsplit
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _format_time(value):
+    return value.isoformat().replace("+00:00", "Z")
+
+
+class StubApi:
+    """
+    Локальный HTTP-сервер вместо eapi.stalcraft.net и exbo.net/oauth.
+    Отдаёт записанные страницы лотов, сдвинутые к эпохе new_epoch(): все лоты
+    «выставлены» в эту секунду, а до конца им осталось столько же, сколько
+    на момент самого нового лота записи. Новая эпоха — новые лоты для
+    processed_lots; та же эпоха — повтор уже виденных. Задержка от startTime
+    до уведомления — время самого пайплайна с начала прохода.
+    """
+
+    def __init__(self, pages):
+        self.requests = 0
+        self.epoch = datetime.now(timezone.utc)
+        self._server = None
+        self.port = None
+        self.items = {}  # item_id -> {"time_created": [...], "time_left": [...]}
+        for item_id, lots in pages.items():
+            newest = max(_parse_time(lot["startTime"]) for lot in lots)
+            entries = [
+                (
+                    lot,
+                    _parse_time(lot["startTime"]),
+                    _parse_time(lot["endTime"]) - newest,
+                )
+                for lot in lots
+            ]
+            self.items[item_id] = {
+                "time_created": sorted(entries, key=lambda e: e[1], reverse=True),
+                "time_left": sorted(entries, key=lambda e: e[2]),
+            }
+
+    def new_epoch(self):
+        self.epoch = datetime.now(timezone.utc)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        # Минимальный HTTP/1.1 с keep-alive — ровно то, что шлёт httpx
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode().split(" ", 2)
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode().partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                if length:
+                    await reader.readexactly(length)
+
+                status, body = self._route(method, target)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _route(self, method, target):
+        parts = urlsplit(target)
+        if method == "POST" and parts.path.endswith("/oauth/token"):
+            return "200 OK", b'{"access_token": "replay", "expires_in": 86400}'
+
+        segments = parts.path.strip("/").split("/")
+        # /ru/auction/{item_id}/lots
+        if len(segments) != 4 or segments[1] != "auction" or segments[3] != "lots":
+            return "404 Not Found", b"{}"
+        item = self.items.get(segments[2])
+        if item is None:
+            return "404 Not Found", b"{}"
+        self.requests += 1
+
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        sort = "time_left" if query.get("sort") == "time_left" else "time_created"
+        order = item[sort]
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", 20))
+
+        started = _format_time(self.epoch)
+        lots = [
+            {
+                **lot,
+                "startTime": started,
+                "endTime": _format_time(self.epoch + remaining),
+            }
+            for lot, _, remaining in order[offset : offset + limit]
+        ]
+        return "200 OK", json.dumps({"total": len(order), "lots": lots}).encode()
+
+
+def _matches(doc, query):
+    for field, expected in query.items():
+        if field == "$or":
+            if not any(_matches(doc, sub) for sub in expected):
+                return False
+        elif isinstance(expected, dict) and "$in" in expected:
+            if doc.get(field) not in expected["$in"]:
+                return False
+        elif doc.get(field) != expected:
+            return False
+    return True
+
+
+class MemoryCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+    async def to_list(self, length=None):
+        return list(self.docs)
+
+
+class MemoryCollection:
+    """
+    Коллекция Mongo в памяти: только операции, которые делает пайплайн
+    опроса (find с $or/$in, distinct, insert_many, bulk_write из UpdateOne).
+    key_fields — «уникальный индекс» для поиска по точному совпадению.
+    Считает обращения к базе (round_trips) и операции записи (writes).
+    """
+
+    def __init__(self, key_fields=()):
+        self.key_fields = key_fields
+        self.docs = {}
+        self.round_trips = 0
+        self.writes = 0
+
+    def reset_counters(self):
+        self.round_trips = 0
+        self.writes = 0
+
+    def _key_of(self, doc):
+        if self.key_fields:
+            return tuple(doc.get(field) for field in self.key_fields)
+        return len(self.docs)
+
+    def _lookup(self, query):
+        exact = self.key_fields and set(query) == set(self.key_fields)
+        if exact and not any(isinstance(v, dict) for v in query.values()):
+            doc = self.docs.get(self._key_of(query))
+            return [doc] if doc is not None else []
+        return [doc for doc in self.docs.values() if _matches(doc, query)]
+
+    def find(self, query=None, projection=None):
+        self.round_trips += 1
+        query = query or {}
+        if set(query) == {"$or"}:
+            found = {}
+            for sub in query["$or"]:
+                for doc in self._lookup(sub):
+                    found[id(doc)] = doc
+            return MemoryCursor(list(found.values()))
+        return MemoryCursor(self._lookup(query))
+
+    async def distinct(self, field):
+        self.round_trips += 1
+        return list({doc.get(field) for doc in self.docs.values()})
+
+    async def insert_many(self, docs, ordered=True):
+        self.round_trips += 1
+        for doc in docs:
+            self.writes += 1
+            self.docs[self._key_of(doc)] = doc
+
+    async def bulk_write(self, requests, ordered=True):
+        self.round_trips += 1
+        for op in requests:
+            self.writes += 1
+            # pymongo.UpdateOne хранит аргументы в этих атрибутах
+            self._update(op._filter, op._doc, op._upsert)
+
+    def _update(self, query, update, upsert):
+        docs = self._lookup(query)
+        if not docs:
+            if not upsert:
+                return
+            doc = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            doc.update(update.get("$setOnInsert", {}))
+            self.docs[self._key_of(doc)] = doc
+            docs = [doc]
+        doc = docs[0]
+        doc.update(update.get("$set", {}))
+        for field, value in update.get("$addToSet", {}).items():
+            values = doc.setdefault(field, [])
+            for item in value["$each"] if isinstance(value, dict) else [value]:
+                if item not in values:
+                    values.append(item)
+        for field, delta in update.get("$inc", {}).items():
+            doc[field] = doc.get(field, 0) + delta
+
+
+class FakeBot:
+    """Вместо Telegram: только считает отправленные сообщения."""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_message(self, chat_id, text):
+        self.sent += 1
+
+
+def make_pages(item_ids, lots_per_item, rng):
+    """Синтетическая «запись»: лоты выставлялись раз в минуту, идут 1 мин – 24 ч."""
+    recorded_at = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+    pages = {}
+    for item_id in item_ids:
+        lots = []
+        for i in range(lots_per_item):
+            amount = rng.randint(1, 20)
+            lots.append(
+                {
+                    "itemId": item_id,
+                    "amount": amount,
+                    "startPrice": rng.randint(1_000, 50_000) * amount,
+                    "currentPrice": rng.randint(1_000, 60_000) * amount,
+                    # Часть лотов без выкупа — они идут только по ставке
+                    "buyoutPrice": (
+                        rng.randint(2_000, 100_000) * amount
+                        if rng.random() < 0.8
+                        else 0
+                    ),
+                    "startTime": _format_time(recorded_at - timedelta(minutes=i)),
+                    "endTime": _format_time(
+                        recorded_at + timedelta(minutes=rng.randint(1, 24 * 60))
+                    ),
+                    "additional": {
+                        "qlt": rng.randint(0, 5),
+                        "stats_random": rng.uniform(-1, 1),
+                    },
+                }
+            )
+        pages[item_id] = lots
+    return pages
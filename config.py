@@ -19,3 +19,30 @@ API_BASE_URL = "https://eapi.stalcraft.net"
 AUTH_URL = "https://exbo.net/oauth/token"
 CLIENT_ID = os.getenv("CLIENT_ID")
 CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+# Несколько приложений EXBO: "id1:secret1,id2:secret2". Лимит запросов ниже
+# действует на каждое отдельно. Без переменной — одна пара CLIENT_ID/SECRET
+API_CREDENTIALS = [
+    tuple(part.strip() for part in pair.split(":", 1))
+    for pair in os.getenv("API_CREDENTIALS", "").split(",")
+    if ":" in pair
+] or [(CLIENT_ID, CLIENT_SECRET)]
+
+# Лимит запросов к API (token bucket) на одно приложение: в минуту и всплеск
+API_REQUESTS_PER_MIN = int(os.getenv("API_REQUESTS_PER_MIN", 190))
+API_BURST = int(os.getenv("API_BURST", 10))
+
+# Сколько лотов показывать в одной сводке уведомлений
+DIGEST_MAX_LOTS = int(os.getenv("DIGEST_MAX_LOTS", 10))
+
+# Локальный /metrics для Prometheus
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9108))
+
+# Опрос аукциона внутри процесса бота. Выключите (0), если запускаете
+# отдельные воркеры `python poller.py` — иначе item_id опросят дважды
+POLLER_IN_BOT = os.getenv("POLLER_IN_BOT", "1") == "1"
+# Воркеры poller.py с одними и теми же API_CREDENTIALS делят лимит поровну.
+# Выключите (0), только если у каждого воркера свои приложения
+POLLER_SPLIT_API_BUDGET = os.getenv("POLLER_SPLIT_API_BUDGET", "1") == "1"
+# Как часто отдельный воркер перечитывает фильтры и пользователей из БД
+POLLER_REFRESH_SECONDS = int(os.getenv("POLLER_REFRESH_SECONDS", 30))
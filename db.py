@@ -1,11 +1,40 @@
 # stalcraft_bot/db.py
 
-from pymongo import MongoClient
+from datetime import datetime, timedelta, timezone
+from pymongo import ASCENDING, AsyncMongoClient
 from config import MONGO_URI, MONGO_DB_NAME
 
-client = MongoClient(MONGO_URI)
+client = AsyncMongoClient(MONGO_URI)
 db = client[MONGO_DB_NAME]
 
 users_collection = db["users"]
 tracked_items = db["tracked_items"]
 processed_lots = db["processed_lots"]
+poller_leases = db["poller_leases"]
+notification_outbox = db["notification_outbox"]
+
+
+async def ensure_indexes():
+    """Создаём индексы при старте (повторный вызов ничего не меняет)."""
+    await processed_lots.create_index(
+        [("item_id", ASCENDING), ("start_time", ASCENDING), ("end_time", ASCENDING)]
+    )
+    # Записи удаляются сами, как только лот закончился
+    await processed_lots.create_index("expire_at", expireAfterSeconds=0)
+
+    # Старые записи без expire_at TTL не тронет — чистим их вручную
+    await processed_lots.delete_many(
+        {
+            "expire_at": {"$exists": False},
+            "created_at": {"$lt": datetime.now(timezone.utc) - timedelta(days=2)},
+        }
+    )
+
+    # Аренды упавших воркеров опроса убираем из коллекции
+    await poller_leases.create_index("expire_at", expireAfterSeconds=0)
+
+    # Очередь уведомлений от процессов опроса к боту
+    await notification_outbox.create_index(
+        [("claimed_until", ASCENDING), ("created_at", ASCENDING)]
+    )
+    await notification_outbox.create_index("expire_at", expireAfterSeconds=0)
@@ -7,12 +7,15 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
-from db import users_collection, tracked_items
+from repositories import users, tracked_items, processed_lots, notification_outbox
 from datetime import date, datetime, timedelta, time
 import secrets
 from utils.decorators import admin_required
 from bson import ObjectId
 from config import ADMIN_ID
+from services.search import catalog
+from services.latency import detection_latency
+from services.user_cache import invalidate_user, invalidate_valid_user_ids
 
 
 # Состояния
@@ -32,6 +35,8 @@ def get_handler():
             CommandHandler("change_limit", change_limit_start),
             CommandHandler("clear_user_items", clear_user_items_start),
             CommandHandler("remove_user", remove_user_start),
+            CommandHandler("reload_items", reload_items),
+            CommandHandler("stats", stats),
         ],
         states={
             ASK_EMAIL: [
@@ -93,7 +98,7 @@ async def add_user_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     password = secrets.token_urlsafe(6)  # генерация пароля
     reg_date = datetime.now()
 
-    users_collection.insert_one(
+    await users.create(
         {
             "login": email,
             "password": password,
@@ -117,15 +122,15 @@ async def add_user_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 @admin_required
 async def user_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    users = list(users_collection.find())
-    total = len(users)
+    all_users = await users.list_all()
+    total = len(all_users)
 
     if total == 0:
         await update.message.reply_text("👥 Пользователей пока нет.")
         return
 
     msg = f"👥 Всего пользователей: {total}\n\n"
-    for i, user in enumerate(users, start=1):
+    for i, user in enumerate(all_users, start=1):
         email = user.get("login", "—")
         current = user.get("current_items", 0)
         max_items = user.get("max_items", 0)
@@ -155,11 +160,7 @@ async def find_user_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def process_user_identifier(update: Update, context: ContextTypes.DEFAULT_TYPE):
     identifier = update.message.text.strip()
 
-    query = {"$or": [{"login": identifier}, {"user_id": identifier}]}
-    if identifier.isdigit():
-        query["$or"].append({"user_id": int(identifier)})
-
-    user = users_collection.find_one(query)
+    user = await users.find_by_identifier(identifier)
 
     if not user:
         await update.message.reply_text("❌ Пользователь не найден.")
@@ -190,11 +191,7 @@ async def change_limit_start(update: Update, context: ContextTypes.DEFAULT_TYPE)
 @admin_required
 async def process_limit_user(update: Update, context: ContextTypes.DEFAULT_TYPE):
     identifier = update.message.text.strip()
-    query = {"$or": [{"login": identifier}]}
-    if identifier.isdigit():
-        query["$or"].append({"user_id": int(identifier)})
-
-    user = users_collection.find_one(query)
+    user = await users.find_by_identifier(identifier)
 
     if not user:
         await update.message.reply_text("❌ Пользователь не найден.")
@@ -217,12 +214,10 @@ async def save_new_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text("⚠️ Ошибка: не указан пользователь.")
             return ConversationHandler.END
 
-        result = users_collection.update_one(
-            {"_id": ObjectId(user_mongo_id)},
-            {"$set": {"max_items": new_limit}},
-        )
+        updated = await users.set_max_items(ObjectId(user_mongo_id), new_limit)
+        invalidate_user()
 
-        if result.modified_count > 0:
+        if updated:
             await update.message.reply_text(f"✅ Лимит обновлён до {new_limit}.")
         else:
             await update.message.reply_text("⚠️ Лимит не был обновлён.")
@@ -234,10 +229,6 @@ async def save_new_limit(update: Update, context: ContextTypes.DEFAULT_TYPE):
     return ConversationHandler.END
 
 
-from bson import ObjectId
-from db import tracked_items
-
-
 @admin_required
 async def clear_user_items_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("🧹 Введите логин или Telegram ID пользователя:")
@@ -247,24 +238,21 @@ async def clear_user_items_start(update: Update, context: ContextTypes.DEFAULT_T
 @admin_required
 async def clear_user_items_process(update: Update, context: ContextTypes.DEFAULT_TYPE):
     identifier = update.message.text.strip()
-    query = {"$or": [{"login": identifier}]}
-    if identifier.isdigit():
-        query["$or"].append({"user_id": int(identifier)})
-
-    user = users_collection.find_one(query)
+    user = await users.find_by_identifier(identifier)
 
     if not user:
         await update.message.reply_text("❌ Пользователь не найден.")
         return ConversationHandler.END
 
     user_id = user.get("user_id")
-    result = tracked_items.delete_many({"user_id": user_id})
+    deleted_count = await tracked_items.delete_by_user(user_id)
 
     # Обнуляем current_items
-    users_collection.update_one({"_id": user["_id"]}, {"$set": {"current_items": 0}})
+    await users.update_by_id(user["_id"], {"current_items": 0})
+    invalidate_user(user_id)
 
     await update.message.reply_text(
-        f"✅ Удалено {result.deleted_count} отслеживаемых позиций у пользователя {user['login']}.\n"
+        f"✅ Удалено {deleted_count} отслеживаемых позиций у пользователя {user['login']}.\n"
         f"🔁 Лимит сброшен до 0 / {user.get('max_items', 0)}"
     )
     return ConversationHandler.END
@@ -281,11 +269,7 @@ async def remove_user_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @admin_required
 async def remove_user_lookup(update: Update, context: ContextTypes.DEFAULT_TYPE):
     identifier = update.message.text.strip()
-    query = {"$or": [{"login": identifier}]}
-    if identifier.isdigit():
-        query["$or"].append({"user_id": int(identifier)})
-
-    user = users_collection.find_one(query)
+    user = await users.find_by_identifier(identifier)
 
     if not user:
         await update.message.reply_text("❌ Пользователь не найден.")
@@ -314,14 +298,16 @@ async def confirm_user_removal(update: Update, context: ContextTypes.DEFAULT_TYP
     user_id = context.user_data.get("delete_user_id")
     login = context.user_data.get("delete_user_login")
 
-    user = users_collection.find_one({"_id": user_id})
+    user = await users.find_by_id(user_id)
     if not user:
         await update.callback_query.edit_message_text("❌ Пользователь уже удалён.")
         return ConversationHandler.END
 
     # Удаляем отслеживания и самого пользователя
-    tracked_items.delete_many({"user_id": user.get("user_id")})
-    users_collection.delete_one({"_id": user_id})
+    await tracked_items.delete_by_user(user.get("user_id"))
+    await users.delete_by_id(user_id)
+    invalidate_user(user.get("user_id"))
+    invalidate_valid_user_ids()
 
     await update.callback_query.edit_message_text(
         f"✅ Пользователь {login} и все его данные удалены."
@@ -336,22 +322,53 @@ async def cancel_user_removal(update: Update, context: ContextTypes.DEFAULT_TYPE
     return ConversationHandler.END
 
 
+@admin_required
+async def reload_items(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # Обход каталога и json.load всех файлов — в потоке, не блокируя бота;
+    # partitions подменяются одним присваиванием в конце load()
+    await asyncio.to_thread(catalog.reload)
+    await update.message.reply_text(
+        f"🔄 База предметов перечитана: "
+        f"{len(catalog.partitions['item']['items'])} товаров, "
+        f"{len(catalog.partitions['artifact']['items'])} артефактов."
+    )
+    return ConversationHandler.END
+
+
+@admin_required
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    lots = await processed_lots.stats()
+    msg = f"🗄 processed_lots: {lots['count']} записей\n"
+    if lots["size"] is not None:
+        msg += (
+            f"   Данные: {lots['size'] / 1024:.1f} КБ, "
+            f"индексы: {lots['index_size'] / 1024:.1f} КБ\n"
+        )
+    pending = await notification_outbox.pending_count()
+    msg += f"📤 Уведомлений в outbox: {pending}\n"
+
+    # Задержка от выставления лота до совпадения / доставки, секунды
+    summary = detection_latency.summary()
+    if summary:
+        msg += "\n⏱ Задержка обнаружения (p50 / p90 / p99, сек):\n"
+    for row in summary:
+        msg += f"\n{row['name']}:\n"
+        for stage, label in (("match", "найден"), ("delivered", "доставлен")):
+            p = row[stage]
+            if p:
+                msg += (
+                    f"   {label}: {p['p50']:.0f} / {p['p90']:.0f} / {p['p99']:.0f}"
+                    f" ({p['count']} шт)\n"
+                )
+    await update.message.reply_text(msg)
+    return ConversationHandler.END
+
+
 async def check_expired_subscriptions(app):
     print("[DEBUG] RUN check_expired_subscriptions")
     today = datetime.combine(datetime.utcnow().date(), time.min)
 
-    users = users_collection.find(
-        {
-            "reg_date": {"$exists": True},
-            "$or": [
-                {"pending_control_until": {"$exists": False}},
-                {"pending_control_until": None},
-                {"pending_control_until": {"$lt": today}},
-            ],
-        }
-    )
-
-    for user in users:
+    for user in await users.list_for_subscription_check(today):
         login = user["login"]
         reg_date = user["reg_date"]
 
@@ -411,10 +428,10 @@ async def extend_subscription(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.callback_query.answer()
     login = update.callback_query.data.split(":")[1]
 
-    users_collection.update_one(
-        {"login": login},
-        {"$set": {"reg_date": datetime.utcnow(), "pending_control_until": None}},
+    await users.update_by_login(
+        login, {"reg_date": datetime.utcnow(), "pending_control_until": None}
     )
+    invalidate_user()
 
     await update.callback_query.edit_message_text(
         f"✅ Подписка пользователя `{login}` продлена на 30 дней.",
@@ -426,10 +443,12 @@ async def remove_subscription_user(update: Update, context: ContextTypes.DEFAULT
     await update.callback_query.answer()
     login = update.callback_query.data.split(":")[1]
 
-    user = users_collection.find_one({"login": login})
+    user = await users.find_by_login(login)
     if user:
-        tracked_items.delete_many({"user_id": user.get("user_id")})
-        users_collection.delete_one({"_id": user["_id"]})
+        await tracked_items.delete_by_user(user.get("user_id"))
+        await users.delete_by_id(user["_id"])
+        invalidate_user(user.get("user_id"))
+        invalidate_valid_user_ids()
 
     await update.callback_query.edit_message_text(
         f"❌ Пользователь `{login}` удалён.", parse_mode="Markdown"
@@ -442,14 +461,12 @@ async def put_subscription_on_control(
     await update.callback_query.answer()
     login = update.callback_query.data.split(":")[1]
 
-    users_collection.update_one(
-        {"login": login},
+    await users.update_by_login(
+        login,
         {
-            "$set": {
-                "pending_control_until": datetime.combine(
-                    datetime.utcnow().date() + timedelta(days=5), time.min
-                )
-            }
+            "pending_control_until": datetime.combine(
+                datetime.utcnow().date() + timedelta(days=5), time.min
+            )
         },
     )
 
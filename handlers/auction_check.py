@@ -1,51 +1,63 @@
 import asyncio
-from datetime import datetime, timezone
-from db import tracked_items, processed_lots, users_collection
-from config import API_BASE_URL, CLIENT_ID, CLIENT_SECRET, AUTH_URL
-import httpx
-
-REQUESTS_PER_MIN = 190  # с запасом для лимита
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from repositories import processed_lots, tracked_items
+from config import DIGEST_MAX_LOTS
+from services.matcher import FilterIndex
+from services.metrics import (
+    LOTS_TOTAL,
+    POLL_QUEUE_DEPTH,
+    POLL_SECONDS,
+    POLLS_TOTAL,
+    STAGE_SECONDS,
+)
+from services.notifier import notifier
+from services.scheduler import PollScheduler
+from services.tracked_cache import tracked_cache
+from services.stalcraft_api import StalcraftAuth, fetch_lots
+from services.user_cache import get_valid_user_ids, invalidate_valid_user_ids
+
+POLL_WORKERS = 10  # сколько item_id опрашиваем одновременно
 TRACK_WINDOW_MINUTES = 10  # интервал отслеживания (по твоему требованию)
-
-
-# Авторизация к API
-class StalcraftAuth:
-    _token = None
-    _token_created = None
-    _token_lifetime = 3600  # секунд
-
-    @classmethod
-    async def get_token(cls):
-        now = datetime.utcnow().timestamp()
-        if (
-            cls._token
-            and cls._token_created
-            and now - cls._token_created < cls._token_lifetime - 60
-        ):
-            return cls._token
-        async with httpx.AsyncClient(timeout=3) as client:
-            resp = await client.post(
-                AUTH_URL,
-                data={
-                    "grant_type": "client_credentials",
-                    "client_id": CLIENT_ID,
-                    "client_secret": CLIENT_SECRET,
-                },
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            cls._token = data["access_token"]
-            cls._token_created = now
-            return cls._token
-
-
-def calc_artifact_percent(lot_additional: dict) -> float | None:
+SCHEDULER_TICK = 1  # секунд между проверками расписания
+INCREMENTAL_PAGE_SIZE = 10  # первая страница обычного опроса
+INCREMENTAL_MAX_PAGE = 200  # дальше страница растёт вдвое, но не больше лимита API
+INCREMENTAL_MAX_LOTS = 200  # больше за один опрос не догоняем
+ENDING_PAGE_SIZE = 10  # лотов с ближайшим окончанием — для окна ставок
+BACKFILL_LIMIT = 200  # лотов при первой проверке нового фильтра
+BACKFILL_RETRY_MIN = 30  # секунд до повтора неудачной глубокой проверки
+BACKFILL_RETRY_MAX = 600  # дальше задержка не растёт
+
+# item_id -> {"start_time": самый новый startTime, "keys": лоты с этим startTime}
+watermarks = {}
+# item_id -> {"ends": окончания известных лотов, "horizon": см. needs_ending_check}
+ending_state = {}
+# _id фильтров, глубокая проверка которых уже в очереди
+backfill_in_flight = set()
+# _id фильтра -> (monotonic, раньше которого не повторяем; текущая задержка)
+backfill_retry = {}
+# item_id -> [asyncio.Lock, сколько задач его держат или ждут]
+item_locks = {}
+
+RARITY_NAMES = [
+    "Обычный",
+    "Необычный",
+    "Особый",
+    "Редкий",
+    "Исключительный",
+    "Легендарный",
+]
+
+# Бюджет опроса — сумма лимитов всех приложений из API_CREDENTIALS
+scheduler = PollScheduler(StalcraftAuth.total_rate(), TRACK_WINDOW_MINUTES)
+
+
+def calc_artifact_percent(qlt: int, stats_random: float | None) -> float | None:
     """
-    Возвращает процент качества артефакта по JSON.
+    Возвращает процент качества артефакта по qlt и stats_random лота.
     Если qlt отсутствует, считается qlt=0 (обычный).
     """
-    qlt = lot_additional.get("qlt", 0)
-    stats_random = lot_additional.get("stats_random")
     if stats_random is None:
         return None
 
@@ -65,181 +77,414 @@ def calc_artifact_percent(lot_additional: dict) -> float | None:
 
 
 # Основная функция
-async def check_auction_items(application):
-    request_count = 0
-    start_time = datetime.utcnow().timestamp()
+async def check_auction_items(shard=None, refresh_interval=None, publisher=notifier):
+    """
+    Цикл опроса. shard — services.sharding.ShardLease отдельного воркера:
+    опрашиваем только свои item_id. В чужом процессе хуки записи кэш не
+    обновляют, поэтому воркер перечитывает БД раз в refresh_interval секунд.
+    publisher — куда отдаём уведомления: notifier бота или outbox в Mongo.
+    """
     print("[DEBAG] Auction monitoring started")
+    queue = asyncio.Queue()
+    POLL_QUEUE_DEPTH.set_function(queue.qsize)
+    workers = [
+        asyncio.create_task(poll_worker(queue, publisher))
+        for _ in range(POLL_WORKERS)
+    ]
+    refreshed_at = time.monotonic()
+    try:
+        while True:
+            # Фильтры читаем из БД один раз, дальше кэш обновляется при записи;
+            # отдельный воркер хуков не видит и перечитывает всё по таймеру
+            refresh_due = time.monotonic() - refreshed_at >= (refresh_interval or 0)
+            if refresh_interval and refresh_due:
+                tracked_cache.load(await tracked_items.list_active())
+                invalidate_valid_user_ids()
+                refreshed_at = time.monotonic()
+            elif not tracked_cache.loaded:
+                tracked_cache.load(await tracked_items.list_active())
+
+            items_by_id = tracked_cache.by_item_id()
+            if shard is not None:
+                items_by_id = {
+                    item_id: items
+                    for item_id, items in items_by_id.items()
+                    if shard.owns(item_id)
+                }
+            # Состояние удалённых или переехавших к другим воркерам item_id
+            for state in (watermarks, ending_state):
+                for item_id in state.keys() - items_by_id.keys():
+                    del state[item_id]
+            if not items_by_id:
+                print("[INFO] No tracked_items")
+                await asyncio.sleep(10)
+                continue
+
+            # Новые и изменённые фильтры — отдельной глубокой проверкой
+            backfill_candidates = [
+                item for item in tracked_cache.all() if item["item_id"] in items_by_id
+            ]
+            for item_id, filters in group_backfill(backfill_candidates).items():
+                queue.put_nowait((backfill_item, item_id, filters))
+
+            # Отдаём воркерам только те item_id, которые пора опрашивать
+            scheduler.sync(items_by_id)
+            for item_id in scheduler.pop_due():
+                queue.put_nowait((poll_item, item_id, items_by_id[item_id]))
+
+            await asyncio.sleep(SCHEDULER_TICK)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        # Дожидаемся воркеров, чтобы после выхода никто не писал в outbox
+        await asyncio.gather(*workers, return_exceptions=True)
+
+
+async def poll_worker(queue, publisher):
     while True:
-        all_items = list(tracked_items.find({"notify": True}))
-        if not all_items:
-            print("[INFO] No tracked_items")
-            await asyncio.sleep(10)
+        job, item_id, items = await queue.get()
+        try:
+            async with item_lock(item_id):
+                await job(item_id, items, publisher)
+        finally:
+            queue.task_done()
+
+
+@asynccontextmanager
+async def item_lock(item_id):
+    """
+    Опрос и глубокая проверка одного item_id идут по очереди: иначе оба
+    прочитают processed_lots до записи и пришлют пользователю лот дважды.
+    """
+    entry = item_locks.setdefault(item_id, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if entry[1] == 0:
+            del item_locks[item_id]
+
+
+async def poll_item(item_id, items, publisher):
+    try:
+        with POLL_SECONDS.time(job="poll"):
+            lots, requests, watermark = await fetch_new_lots(item_id)
+            # Уже виденные лоты, вошедшие в окно ставок, проверяем заново:
+            # цена могла опуститься до фильтра по текущей ставке
+            now = datetime.now(timezone.utc)
+            ending = None
+            if needs_ending_check(item_id, now):
+                ending = await fetch_lots(
+                    item_id, ENDING_PAGE_SIZE, sort="time_left", order="asc"
+                )
+                requests += 1
+            new_lots = lots
+            lots = merge_lots(lots, lots_in_window(ending or [], now))
+            await process_auction_data(items, lots, publisher)
+            # Отметку и окончания двигаем только после обработки: упал опрос —
+            # в следующий раз эти лоты придут снова
+            if watermark is not None:
+                watermarks[item_id] = watermark
+            update_ending_state(item_id, new_lots, ending)
+        scheduler.record(item_id, lots, requests)
+        POLLS_TOTAL.inc(job="poll", result="ok")
+    except asyncio.CancelledError:
+        # Позволяем корректно завершить работу при отмене задачи
+        raise
+    except Exception as e:
+        print(f"[ERROR] Auction check failed for item_id={item_id}: {e}")
+        POLLS_TOTAL.inc(job="poll", result="error")
+        scheduler.retry_later(item_id)
+
+
+def group_backfill(all_items):
+    """
+    Фильтры с first_check, которые ещё не стоят в очереди и не ждут
+    повтора после ошибки, по item_id.
+    """
+    now = time.monotonic()
+    pending = {item["_id"] for item in all_items if item.get("first_check")}
+    # Фильтр удалили или проверку уже сняли — задержка больше не нужна
+    for _id in backfill_retry.keys() - pending:
+        del backfill_retry[_id]
+
+    backfill = {}
+    for item in all_items:
+        if item["_id"] not in pending or item["_id"] in backfill_in_flight:
             continue
+        if backfill_retry.get(item["_id"], (0, 0))[0] > now:
+            continue
+        backfill_in_flight.add(item["_id"])
+        backfill.setdefault(item["item_id"], []).append(item)
+    return backfill
+
+
+def backfill_failed(filters):
+    """Повтор через BACKFILL_RETRY_MIN, дальше задержка удваивается."""
+    now = time.monotonic()
+    for f in filters:
+        delay = backfill_retry.get(f["_id"], (0, 0))[1] * 2
+        delay = min(BACKFILL_RETRY_MAX, max(BACKFILL_RETRY_MIN, delay))
+        backfill_retry[f["_id"]] = (now + delay, delay)
+
+
+async def backfill_item(item_id, filters, publisher):
+    """
+    Глубокая проверка (BACKFILL_LIMIT лотов) только для новых фильтров.
+    Водяную отметку не двигаем — остальные фильтры эти лоты ещё не видели.
+    """
+    try:
+        with POLL_SECONDS.time(job="backfill"):
+            lots = await fetch_lots(item_id, BACKFILL_LIMIT)
+            # Старые лоты не «обнаружены» только что — задержку не считаем
+            await process_auction_data(
+                filters, lots, publisher, track_latency=False
+            )
+        # Правку фильтра во время проверки не затираем — проверим его заново
+        await tracked_items.clear_first_check(filters)
+        for f in filters:
+            backfill_retry.pop(f["_id"], None)
+        POLLS_TOTAL.inc(job="backfill", result="ok")
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"[ERROR] Backfill failed for item_id={item_id}: {e}")
+        POLLS_TOTAL.inc(job="backfill", result="error")
+        backfill_failed(filters)
+    finally:
+        for f in filters:
+            backfill_in_flight.discard(f["_id"])
+
+
+def is_seen(lot, watermark):
+    start_time = lot.start_time or ""
+    if start_time != watermark["start_time"]:
+        return start_time < watermark["start_time"]
+    return lot_key(lot) in watermark["keys"]
 
-        # Группируем по item_id
-        items_by_id = {}
-        for item in all_items:
-            items_by_id.setdefault(item["item_id"], []).append(item)
-
-        for item_id, items in items_by_id.items():
-            # API limit control
-
-            limit = 200 if any(item.get("first_check") for item in items) else 10
-            # print(f"[DEBUG] For item_id={item_id} limit={limit}")
-
-            if request_count >= REQUESTS_PER_MIN:
-                elapsed = datetime.utcnow().timestamp() - start_time
-                if elapsed < 60:
-                    await asyncio.sleep(60 - elapsed)
-                request_count = 0
-                start_time = datetime.utcnow().timestamp()
-            try:
-                token = await StalcraftAuth.get_token()
-                headers = {"Authorization": f"Bearer {token}"}
-                params = {
-                    "additional": "true",
-                    "limit": limit,
-                }
-                async with httpx.AsyncClient(timeout=3) as client:
-                    url = f"{API_BASE_URL}/ru/auction/{item_id}/lots"
-                    resp = await client.get(url, headers=headers, params=params)
-                    resp.raise_for_status()
-                    data = resp.json()
-                lots = data.get("lots", [])
-                await process_auction_data(application, items, lots)
-
-                if limit == 200:
-                    tracked_items.update_many(
-                        {"item_id": item_id, "first_check": True},
-                        {"$set": {"first_check": False}},
-                    )
-
-                request_count += 1
-            except asyncio.CancelledError:
-                # Позволяем корректно завершить работу при отмене задачи
-                raise
-            except Exception as e:
-                print(f"[ERROR] Auction check failed for item_id={item_id}: {e}")
-                await asyncio.sleep(1)
-        # await asyncio.sleep(10)  # Пауза между циклами
-
-
-async def process_auction_data(application, tracked_items_for_id, lots):
-    now = datetime.now(timezone.utc)
 
+def next_watermark(item_id, lots):
+    """
+    Самый новый startTime и лоты с ним (лоты идут новые первыми). Не
+    сохраняем: это делает poll_item, когда лоты обработаны. None — не меняется.
+    """
+    if not lots:
+        return None
+    top = lots[0].start_time or ""
+    keys = {lot_key(lot) for lot in lots if (lot.start_time or "") == top}
+    watermark = watermarks.get(item_id)
+    if watermark and watermark["start_time"] == top:
+        keys |= watermark["keys"]
+    elif watermark and watermark["start_time"] > top:
+        return None
+    return {"start_time": top, "keys": keys}
+
+
+async def fetch_new_lots(item_id):
+    """
+    Постранично забираем только лоты, появившиеся после прошлого опроса.
+    Обычно хватает первой маленькой страницы; пока отметка не найдена,
+    каждая следующая вдвое больше — всплеск из 200 лотов стоит нескольких
+    запросов, а не двадцати. Без водяной отметки — одна страница.
+    Возвращает (лоты, число запросов, новую водяную отметку или None).
+    """
+    watermark = watermarks.get(item_id)
+    new_lots = []
+    offset = 0
+    requests = 0
+    page_size = INCREMENTAL_PAGE_SIZE
+    while True:
+        limit = min(page_size, INCREMENTAL_MAX_LOTS - offset)
+        page = await fetch_lots(item_id, limit, offset)
+        requests += 1
+        page_size = min(page_size * 2, INCREMENTAL_MAX_PAGE)
+        reached = False
+        for lot in page:
+            if watermark and is_seen(lot, watermark):
+                reached = True
+                break
+            new_lots.append(lot)
+        offset += len(page)
+        if (
+            reached
+            or not watermark
+            or len(page) < limit
+            or offset >= INCREMENTAL_MAX_LOTS
+        ):
+            break
+    return new_lots, requests, next_watermark(item_id, new_lots)
+
+
+def needs_ending_check(item_id, now):
+    """
+    Есть ли лоты в окне ставок. Знаем окончания лотов с прошлой страницы
+    «скоро заканчиваются» и новых лотов; horizon — окончание последнего лота
+    полной страницы, остальные неизвестные лоты заканчиваются не раньше.
+    """
+    state = ending_state.get(item_id)
+    if state is None:
+        return True
+    state["ends"] = [end for end in state["ends"] if end > now]
+    window_end = now + timedelta(minutes=TRACK_WINDOW_MINUTES)
+    if state["horizon"] is not None and state["horizon"] <= window_end:
+        return True
+    return any(end <= window_end for end in state["ends"])
+
+
+def update_ending_state(item_id, new_lots, ending_page):
+    state = ending_state.get(item_id)
+    if ending_page is not None:
+        horizon = None
+        if len(ending_page) >= ENDING_PAGE_SIZE:
+            horizon = _end_time_or_none(ending_page[-1])
+        state = ending_state[item_id] = {"ends": [], "horizon": horizon}
+        lots = [*ending_page, *new_lots]
+    elif state is not None:
+        lots = new_lots
+    else:
+        return
+    for lot in lots:
+        end_time = _end_time_or_none(lot)
+        if end_time is not None:
+            state["ends"].append(end_time)
+
+
+def lots_in_window(lots, now):
+    window_end = now + timedelta(minutes=TRACK_WINDOW_MINUTES)
+    return [
+        lot
+        for lot in lots
+        if (end_time := _end_time_or_none(lot)) is not None and end_time <= window_end
+    ]
+
+
+def merge_lots(*groups):
+    """Один лот может прийти и новым, и в окне ставок — оставляем один раз."""
+    merged = {}
+    for lots in groups:
+        for lot in lots:
+            merged[lot_key(lot)] = lot
+    return list(merged.values())
+
+
+def _end_time_or_none(lot):
+    try:
+        return parse_end_time(lot.end_time)
+    except Exception:
+        return None
+
+
+async def process_auction_data(
+    tracked_items_for_id, lots, publisher=notifier, track_latency=True
+):
+    now = datetime.now(timezone.utc)
+    LOTS_TOTAL.inc(len(lots))
+    # Фильтры удалённых пользователей отбрасываем сразу, без запросов к БД
+    valid_user_ids = await get_valid_user_ids()
+    index = FilterIndex(
+        [f for f in tracked_items_for_id if f["user_id"] in valid_user_ids]
+    )
+
+    active_lots = []
     # Запись JSON,если предмет соответствует фильтру
     for lot in lots:
-        if lot.get("itemId") == "49zn" and lot["buyoutPrice"] >= 180000:
+        if lot.item_id == "49zn" and lot.buyout_price >= 180000:
             import json
 
             with open("debug_lot.json", "a", encoding="utf-8") as f:
-                f.write(json.dumps(lot, ensure_ascii=False, indent=2))
+                f.write(json.dumps(lot.as_dict(), ensure_ascii=False, indent=2))
                 f.write("\n" + "=" * 40 + "\n")
 
-        # Проверка полей
-        if not all(k in lot for k in ("itemId", "amount", "startPrice", "endTime")):
-            continue
+        # Лоты без обязательных полей отброшены ещё при разборе ответа
         # Проверка времени окончания лота
         try:
-            end_time = datetime.fromisoformat(lot["endTime"].replace("Z", "+00:00"))
+            end_time = parse_end_time(lot.end_time)
         except Exception:
             continue
         remaining_minutes = (end_time - now).total_seconds() / 60
         if remaining_minutes <= 0:
             continue
-        # Пропуск уже отправленных лотов
-        if processed_lots.find_one(
-            {
-                "item_id": lot["itemId"],
-                "start_time": lot.get("startTime"),
-                "end_time": lot["endTime"],
-            }
-        ):
-            continue
+        active_lots.append((lot, remaining_minutes))
+
+    # Кому уже отправляли эти лоты — одним запросом на всю страницу
+    with STAGE_SECONDS.time(stage="dedup"):
+        notified = await processed_lots.load_notified_users(
+            {lot_key(lot) for lot, _ in active_lots}
+        )
+    match_start = time.perf_counter()
+    new_notified = {}
+    # Совпадения за опрос копим по пользователю, чтобы отправить одной сводкой
+    matches_by_user = {}
+
+    for lot, remaining_minutes in active_lots:
+        key = lot_key(lot)
+        already_notified = notified.setdefault(key, set())
 
         # Выбор цены: buyout или ставка
 
         price_type = None
-        if remaining_minutes > TRACK_WINDOW_MINUTES and lot.get("buyoutPrice", 0) > 0:
-            total_price = lot["buyoutPrice"]
-            price_per_unit = total_price / lot["amount"]
+        if remaining_minutes > TRACK_WINDOW_MINUTES and lot.buyout_price > 0:
+            total_price = lot.buyout_price
+            price_per_unit = total_price / lot.amount
             price_type = "buyout"
         else:
             price_type = "bid"
-            total_price = lot.get("currentPrice", 0) or lot["startPrice"]
-            price_per_unit = total_price / lot["amount"]
-
-        # Для каждого фильтра отслеживания
-        for filter_ in tracked_items_for_id:
-            # Пропуск если юзер не найден (на всякий случай)
-            user = users_collection.find_one({"user_id": filter_["user_id"]})
-            if not user:
+            total_price = lot.current_price or lot.start_price
+            price_per_unit = total_price / lot.amount
+
+        percent = calc_artifact_percent(lot.qlt, lot.stats_random)
+
+        # Только фильтры, которым лот может подойти
+        for filter_ in index.match(price_per_unit, lot.amount, lot.qlt, percent):
+            # Этому пользователю про лот уже писали
+            if filter_["user_id"] in already_notified:
                 continue
 
-            percent = None
-            # Обычные предметы: по цене и количеству
-            if filter_["type"] == "item":
-
-                if filter_["type"] == "item":
-                    if (
-                        price_per_unit > filter_["price"]
-                        or lot["amount"] < filter_["min_count"]
-                    ):
-                        continue
-                    # отправляем уведомление
-            else:
-
-                # Артефакты:
-                if filter_["type"] == "artifact":
-
-                    add = lot.get("additional", {})
-                    rarity = add.get("qlt", 0)  # по умолчанию 0
-                    percent = calc_artifact_percent(add)
-
-                    # Проверяем редкость (qlt)
-                    if rarity != filter_["rarity"]:
-                        continue
-
-                    # Проверяем процент (если в фильтре задан)
-                    if (
-                        filter_.get("min_percent") is not None
-                        and filter_.get("max_percent") is not None
-                    ):
-                        if percent is None:
-                            continue
-                        if not (
-                            filter_["min_percent"] <= percent <= filter_["max_percent"]
-                        ):
-                            continue
-
-                    # Фильтрация по цене (аналогично предметам)
-                    if price_per_unit > filter_["price"]:
-                        continue
-
-            # Всё подходит — отправляем уведомление
-            await send_lot_notification(
-                application,
-                filter_,
-                lot,
-                price_type,
-                price_per_unit,
-                total_price,
-                remaining_minutes,
-                percent,  # передаём в send_lot_notification
+            # Всё подходит — в уведомление
+            matches_by_user.setdefault(filter_["user_id"], []).append(
+                (
+                    filter_,
+                    lot,
+                    price_type,
+                    price_per_unit,
+                    total_price,
+                    remaining_minutes,
+                    percent if filter_["type"] == "artifact" else None,
+                )
             )
-            processed_lots.insert_one(
-                {
-                    "item_id": lot["itemId"],
-                    "start_time": lot.get("startTime"),
-                    "end_time": lot["endTime"],
-                    "notified_users": [filter_["user_id"]],
-                    "created_at": datetime.now(timezone.utc),
-                }
+            already_notified.add(filter_["user_id"])
+            new_notified.setdefault(key, set()).add(filter_["user_id"])
+
+    STAGE_SECONDS.observe(time.perf_counter() - match_start, stage="match")
+
+    for user_id, matches in matches_by_user.items():
+        if len(matches) == 1:
+            send_lot_notification(
+                *matches[0], track_latency=track_latency, publisher=publisher
             )
+        else:
+            send_lot_digest(
+                user_id, matches, track_latency=track_latency, publisher=publisher
+            )
+
+    # Отметку «уже отправляли» ставим, только когда сообщения надёжно
+    # переданы дальше: упавший процесс опроса не должен их потерять
+    await publisher.flush()
+    with STAGE_SECONDS.time(stage="dedup"):
+        await processed_lots.save_notified_users(new_notified)
 
 
-async def send_lot_notification(
-    application,
+def parse_end_time(end_time):
+    return datetime.fromisoformat(end_time.replace("Z", "+00:00"))
+
+
+def lot_key(lot):
+    return (lot.item_id, lot.start_time, lot.end_time)
+
+
+def send_lot_notification(
     filter_,
     lot,
     price_type,
@@ -247,26 +492,18 @@ async def send_lot_notification(
     total_price,
     remaining_minutes,
     percent=None,
+    track_latency=False,
+    publisher=notifier,
 ):
     try:
-        amount = lot["amount"]
+        amount = lot.amount
         total_price_str = f"{int(total_price):,}".replace(",", " ")
         price_per_unit_str = f"{round(price_per_unit, 2):,}".replace(",", " ")
         msg = ""
 
         # Если это артефакт
         if filter_["type"] == "artifact":
-            add = lot.get("additional", {})
-            rarity_names = [
-                "Обычный",
-                "Необычный",
-                "Особый",
-                "Редкий",
-                "Исключительный",
-                "Легендарный",
-            ]
-            rarity = add.get("qlt", 0)
-            rarity_name = rarity_names[rarity]
+            rarity_name = RARITY_NAMES[lot.qlt]
             msg += (
                 f"🌀 Найден артефакт!\n"
                 f"Название: {filter_['name']}\n"
@@ -291,9 +528,57 @@ async def send_lot_notification(
                 msg += f"Цена за 1 шт: {price_per_unit_str} руб\n"
             msg += f"Время до конца: {int(remaining_minutes)} минут\n"
 
-        await application.bot.send_message(chat_id=filter_["user_id"], text=msg)
-        print(f"[INFO] Notification sent to {filter_['user_id']}")
-    except asyncio.CancelledError:
-        raise
+        # Отправкой занимается очередь notifier (или outbox), поиск не ждёт Telegram
+        # Задержку (match и delivered) считают notifier или бот при чтении outbox.
+        # Ставка в окне ставок — не обнаружение нового лота, её не считаем
+        measured = track_latency and price_type == "buyout"
+        lots = [(lot.item_id, lot.start_time, filter_["name"])] if measured else []
+        publisher.enqueue(filter_["user_id"], msg, lots)
+    except Exception as e:
+        print(f"[ERROR] Failed to build notification: {e}")
+
+
+def send_lot_digest(user_id, matches, track_latency=False, publisher=notifier):
+    """Несколько лотов одного предмета за опрос — одним сообщением, дешёвые сверху."""
+    try:
+        matches = sorted(matches, key=lambda m: m[3])
+        filter_ = matches[0][0]
+        title = "🌀 Артефакт" if filter_["type"] == "artifact" else "🛒 Товар"
+        msg = f"{title}: {filter_['name']}\nНайдено выгодных лотов: {len(matches)}\n\n"
+
+        for (
+            filter_,
+            lot,
+            price_type,
+            price_per_unit,
+            total_price,
+            remaining_minutes,
+            percent,
+        ) in matches[:DIGEST_MAX_LOTS]:
+            amount = lot.amount
+            total_price_str = f"{int(total_price):,}".replace(",", " ")
+            line = (
+                f"• {'Выкуп' if price_type == 'buyout' else 'Ставка'}: "
+                f"{total_price_str} руб"
+            )
+            if amount > 1:
+                price_per_unit_str = f"{round(price_per_unit, 2):,}".replace(",", " ")
+                line += f" ({amount} шт, {price_per_unit_str} руб/шт)"
+            if filter_["type"] == "artifact":
+                line += f", {RARITY_NAMES[lot.qlt]}"
+                if percent is not None:
+                    line += f", {percent}%"
+            line += f", ещё {int(remaining_minutes)} мин\n"
+            msg += line
+
+        if len(matches) > DIGEST_MAX_LOTS:
+            msg += f"…и ещё {len(matches) - DIGEST_MAX_LOTS} лотов дороже\n"
+
+        lots = [
+            (m[1].item_id, m[1].start_time, m[0]["name"])
+            for m in matches
+            if track_latency and m[2] == "buyout"
+        ]
+        publisher.enqueue(user_id, msg, lots)
     except Exception as e:
-        print(f"[ERROR] Failed to send notification: {e}")
+        print(f"[ERROR] Failed to build notification: {e}")
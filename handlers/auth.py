@@ -8,7 +8,8 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
-from db import users_collection
+from repositories import users
+from services.user_cache import invalidate_user, invalidate_valid_user_ids
 
 # Состояния для ConversationHandler
 LOGIN, PASSWORD = range(2)
@@ -40,7 +41,7 @@ async def check_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
     login = context.user_data.get("login")
     password = update.message.text.strip()
 
-    user = users_collection.find_one({"login": login, "password": password})
+    user = await users.find_by_credentials(login, password)
     if not user:
         await update.message.reply_text("Неверный логин или пароль. Попробуйте снова.")
         return LOGIN
@@ -56,9 +57,9 @@ async def check_password(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
 
     # Привязываем user_id
-    users_collection.update_one(
-        {"login": login}, {"$set": {"user_id": update.effective_chat.id}}
-    )
+    await users.bind_user_id(login, update.effective_chat.id)
+    invalidate_user(update.effective_chat.id)
+    invalidate_valid_user_ids()
 
     await update.message.reply_text(
         "✅ Вы успешно авторизованы!\nДля вывода команд — используйте /help."
@@ -1,6 +1,5 @@
 # stalcraft_bot/handlers/tracking.py
 
-from bson import ObjectId  # импорт сверху, для работы с MongoDB _id
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
     CommandHandler,
@@ -10,8 +9,9 @@ from telegram.ext import (
     MessageHandler,
     filters,
 )
-from db import users_collection, tracked_items
+from repositories import users, tracked_items
 from utils.decorators import require_auth
+from services.user_cache import invalidate_user
 from services.search import load_item_by_name
 from utils.validation import get_percent_range_by_rarity, get_rarity_by_percent_range
 from datetime import datetime, timedelta
@@ -100,8 +100,7 @@ def get_edit_handler():
 
 @require_auth
 async def start_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_chat.id
-    user = users_collection.find_one({"user_id": user_id})
+    user = context.auth_user
 
     # Проверка лимита
     if user["current_items"] >= user["max_items"]:
@@ -157,19 +156,11 @@ async def enter_item_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return ENTER_ITEM_NAME
 
-    # Убираем дубликаты по ID
-    unique = {}
-    for item in found:
-        item_id = item["data"].get("id")
-        if item_id not in unique:
-            unique[item_id] = item
-
-    filtered = list(unique.values())
-
-    context.user_data["item_results"] = filtered
+    # Дубликаты (название + синоним одного предмета) уже схлопнуты в поиске
+    context.user_data["item_results"] = found
     buttons = [
         [InlineKeyboardButton(item["name"], callback_data=f"select_item_{i}")]
-        for i, item in enumerate(filtered)
+        for i, item in enumerate(found)
     ]
     reply_markup = InlineKeyboardMarkup(buttons)
 
@@ -330,10 +321,11 @@ async def confirm_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
             document["max_percent"] = context.user_data["max_percent"]
 
     # Сохраняем в БД
-    tracked_items.insert_one(document)
+    await tracked_items.add(document)
 
     # Обновляем счётчик
-    users_collection.update_one({"user_id": user_id}, {"$inc": {"current_items": 1}})
+    await users.change_current_items(user_id, 1)
+    invalidate_user(user_id)
 
     if user_type == "item":
         success_text = "✅ Товар успешно добавлен для отслеживания!"
@@ -453,8 +445,8 @@ async def set_max_percent(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @require_auth
 async def show_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_chat.id
-    user = users_collection.find_one({"user_id": user_id})
-    items = list(tracked_items.find({"user_id": user_id}))
+    user = context.auth_user
+    items = await tracked_items.list_by_user(user_id)
 
     if not items:
         await update.message.reply_text("🗂️ Вы пока не отслеживаете ни одного лота.")
@@ -519,16 +511,15 @@ async def delete_tracked_item(update: Update, context: ContextTypes.DEFAULT_TYPE
     await query.answer()
 
     _id = query.data.replace("delete_", "")
-    item = tracked_items.find_one({"_id": ObjectId(_id)})
+    item = await tracked_items.find_by_id(_id)
 
     if not item:
         await query.edit_message_text("❌ Лот не найден.")
         return ConversationHandler.END
 
-    tracked_items.delete_one({"_id": ObjectId(_id)})
-    users_collection.update_one(
-        {"user_id": update.effective_chat.id}, {"$inc": {"current_items": -1}}
-    )
+    await tracked_items.delete_by_id(_id)
+    await users.change_current_items(update.effective_chat.id, -1)
+    invalidate_user(update.effective_chat.id)
 
     await query.edit_message_text("🗑️ Лот успешно удалён.")
     return ConversationHandler.END
@@ -540,7 +531,7 @@ async def toggle_notify(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     _id = query.data.replace("toggle_", "")
-    item = tracked_items.find_one({"_id": ObjectId(_id)})
+    item = await tracked_items.find_by_id(_id)
 
     if not item:
         await query.edit_message_text("❌ Лот не найден.")
@@ -552,7 +543,7 @@ async def toggle_notify(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if new_notify:
         update_query["first_check"] = True
 
-    tracked_items.update_one({"_id": ObjectId(_id)}, {"$set": update_query})
+    await tracked_items.update_fields(_id, update_query)
 
     status = "включены" if new_notify else "отключены"
     await query.edit_message_text(f"🔔 Уведомления {status}. Обновите /list.")
@@ -565,7 +556,7 @@ async def start_edit_item(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await query.answer()
 
     _id = query.data.replace("edit_", "")
-    item = tracked_items.find_one({"_id": ObjectId(_id)})
+    item = await tracked_items.find_by_id(_id)
 
     if not item:
         await query.edit_message_text("❌ Лот не найден.")
@@ -652,7 +643,7 @@ async def set_new_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
 
     # Получаем текущий объект из базы
-    item = tracked_items.find_one({"_id": ObjectId(item_id)})
+    item = await tracked_items.find_by_id(item_id)
 
     if field == "price":
         if not value.isdigit():
@@ -704,9 +695,8 @@ async def set_new_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
                 if not (allowed_min <= min_p < max_p <= allowed_max):
                     # Удаляем старые проценты, просим ввести новые
-                    tracked_items.update_one(
-                        {"_id": ObjectId(item_id)},
-                        {"$unset": {"min_percent": "", "max_percent": ""}},
+                    await tracked_items.unset_fields(
+                        item_id, ["min_percent", "max_percent"]
                     )
                     context.user_data["edit_field"] = "percent"
                     await (update.message or update.callback_query.message).reply_text(
@@ -726,7 +716,7 @@ async def set_new_value(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
 
     update_data["first_check"] = True
-    tracked_items.update_one({"_id": ObjectId(item_id)}, {"$set": update_data})
+    await tracked_items.update_fields(item_id, update_data)
     await (update.message or update.callback_query.message).reply_text(
         "✅ Параметры успешно обновлены. Используйте /list для просмотра."
     )
@@ -750,12 +740,13 @@ async def confirm_remove_all(update: Update, context: ContextTypes.DEFAULT_TYPE)
     await update.callback_query.answer()
     user_id = update.effective_user.id
 
-    result = tracked_items.delete_many({"user_id": user_id})
+    deleted_count = await tracked_items.delete_by_user(user_id)
 
-    users_collection.update_one({"user_id": user_id}, {"$set": {"current_items": 0}})
+    await users.reset_current_items(user_id)
+    invalidate_user(user_id)
 
     await update.callback_query.edit_message_text(
-        f"✅ Удалено {result.deleted_count} отслеживаемых позиций."
+        f"✅ Удалено {deleted_count} отслеживаемых позиций."
     )
 
 
@@ -770,34 +761,24 @@ async def cancel_remove_all(update: Update, context: ContextTypes.DEFAULT_TYPE):
 @require_auth
 async def not_off(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    result = tracked_items.update_many(
-        {"user_id": user_id}, {"$set": {"notify": False}}
-    )
+    modified_count = await tracked_items.set_notify_for_user(user_id, False)
     await update.message.reply_text(
-        f"🔕 Уведомления отключены для {result.modified_count} позиций."
+        f"🔕 Уведомления отключены для {modified_count} позиций."
     )
 
 
 @require_auth
 async def not_on(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user_id = update.effective_user.id
-    result = tracked_items.update_many(
-        {"user_id": user_id}, {"$set": {"notify": True, "first_check": True}}
-    )
+    modified_count = await tracked_items.set_notify_for_user(user_id, True)
     await update.message.reply_text(
-        f"🔔 Уведомления включены для {result.modified_count} позиций."
+        f"🔔 Уведомления включены для {modified_count} позиций."
     )
 
 
 @require_auth
 async def sub_info(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    user = users_collection.find_one({"user_id": user_id})
-
-    if not user:
-        await update.message.reply_text("❌ Не удалось найти информацию о подписке.")
-        return
-
+    user = context.auth_user
     reg_date = user.get("reg_date")
     max_items = user.get("max_items", 0)
     current_items = user.get("current_items", 0)
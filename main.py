@@ -7,10 +7,16 @@ import traceback
 from telegram import BotCommand, BotCommandScopeDefault, BotCommandScopeChat
 from telegram.ext import Application, CommandHandler, CallbackQueryHandler
 from telegram.error import TelegramError
-from config import TELEGRAM_TOKEN, ADMIN_ID
+from config import TELEGRAM_TOKEN, ADMIN_ID, METRICS_HOST, METRICS_PORT, POLLER_IN_BOT
+from db import ensure_indexes
 from handlers import start, auth, tracking, admin, subscription, auction_check
 from handlers.admin import daily_subscription_check
 from handlers.auction_check import check_auction_items
+from services.search import catalog
+from services.stalcraft_api import init_http_client, close_http_client, StalcraftAuth
+from services.notifier import notifier
+from services.outbox import OutboxConsumer
+from services.metrics import start_metrics_server, stop_metrics_server
 from handlers.tracking import (
     delete_tracked_item,
     toggle_notify,
@@ -25,8 +31,19 @@ logging.basicConfig(
 
 
 async def post_init(application):
+    await ensure_indexes()
+    catalog.load()
+    init_http_client()
+    StalcraftAuth.start_background_refresh()
+    notifier.start(application.bot)
+    await start_metrics_server(METRICS_HOST, METRICS_PORT)
     asyncio.create_task(daily_subscription_check(application))
-    asyncio.create_task(check_auction_items(application))
+    if POLLER_IN_BOT:
+        asyncio.create_task(check_auction_items())
+    else:
+        # Опрос идёт в отдельных процессах poller.py, уведомления — через outbox
+        application.bot_data["outbox_consumer"] = OutboxConsumer(notifier)
+        application.bot_data["outbox_consumer"].start()
     default_commands = [
         BotCommand("start", "Начать работу с ботом"),
         BotCommand("help", "Помощь по командам"),
@@ -49,6 +66,8 @@ async def post_init(application):
         BotCommand("change_limit", "Изменить лимит пользователя"),
         BotCommand("clear_user_items", "Удалить все отслеживаемые товары пользователя"),
         BotCommand("remove_user ", "Удалить пользователя и все его товары"),
+        BotCommand("reload_items", "Перечитать базу предметов"),
+        BotCommand("stats", "Статистика бота"),
     ]
 
     # Команды для всех
@@ -62,6 +81,17 @@ async def post_init(application):
     )
 
 
+async def post_shutdown(application):
+    await notifier.stop()
+    # После notifier: подтверждаем всё, что он успел отправить
+    consumer = application.bot_data.get("outbox_consumer")
+    if consumer is not None:
+        await consumer.stop()
+    await StalcraftAuth.stop_background_refresh()
+    await close_http_client()
+    await stop_metrics_server()
+
+
 def error_handler(update, context):
     print("Unhandled error occurred:")
     traceback.print_exception(
@@ -71,7 +101,11 @@ def error_handler(update, context):
 
 def main():
     application = (
-        Application.builder().token(TELEGRAM_TOKEN).post_init(post_init).build()
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
     )
 
     # Команды
@@ -0,0 +1,85 @@
+# stalcraft_bot/poller.py
+#
+# Отдельный воркер опроса аукциона. Запускается в N экземплярах
+# (POLLER_IN_BOT=0 у бота), каждый забирает свой шард item_id:
+#   METRICS_PORT=9109 python poller.py
+# У каждого процесса на хосте свой METRICS_PORT; на занятом порту процесс
+# работает дальше, но без /metrics.
+# В Telegram воркер не ходит: уведомления кладёт в notification_outbox,
+# оттуда их отправляет бот. Перезапуск любой из сторон другую не трогает.
+#
+# Лимит API: воркеры с одинаковыми API_CREDENTIALS (обычный случай) делят
+# лимит каждого приложения поровну и пересчитывают долю при ребалансировке.
+# Больше воркеров — не больше запросов; для роста нужны новые приложения.
+# Если у каждого воркера свои приложения, ставьте POLLER_SPLIT_API_BUDGET=0.
+
+import asyncio
+import logging
+import signal
+from config import (
+    METRICS_HOST,
+    METRICS_PORT,
+    POLLER_REFRESH_SECONDS,
+    POLLER_SPLIT_API_BUDGET,
+)
+from db import ensure_indexes
+from handlers.auction_check import check_auction_items, scheduler
+from services.metrics import start_metrics_server, stop_metrics_server
+from services.outbox import outbox_publisher
+from services.sharding import ShardLease
+from services.stalcraft_api import init_http_client, close_http_client, StalcraftAuth
+
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s", level=logging.INFO
+)
+
+
+def split_api_budget(workers):
+    """Доля лимита приложений на этот процесс — при каждой смене состава."""
+    StalcraftAuth.set_share(1 / workers)
+    scheduler.requests_per_sec = StalcraftAuth.total_rate()
+    print(f"[INFO] API budget: {scheduler.requests_per_sec:.2f} req/s per worker")
+
+
+async def run():
+    # SIGTERM от docker/systemd — как Ctrl+C: отменяем run() и проходим finally,
+    # чтобы дописать outbox и освободить шард
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
+    await ensure_indexes()
+    init_http_client()
+    StalcraftAuth.start_background_refresh()
+    outbox_publisher.start()
+    await start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    shard = ShardLease(
+        on_rebalance=split_api_budget if POLLER_SPLIT_API_BUDGET else None
+    )
+    # Сначала встаём в кольцо, чтобы не опросить чужие item_id
+    await shard.heartbeat()
+    print(f"[INFO] Poller worker {shard.worker_id} started")
+    heartbeat_task = asyncio.create_task(shard.run())
+    try:
+        await check_auction_items(
+            shard, refresh_interval=POLLER_REFRESH_SECONDS, publisher=outbox_publisher
+        )
+    finally:
+        heartbeat_task.cancel()
+        # Дописываем в outbox всё, что успели найти, — раньше всего остального
+        await outbox_publisher.stop()
+        await shard.release()
+        await StalcraftAuth.stop_background_refresh()
+        await close_http_client()
+        await stop_metrics_server()
+
+
+def main():
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
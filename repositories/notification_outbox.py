@@ -0,0 +1,67 @@
+# stalcraft_bot/repositories/notification_outbox.py
+
+from datetime import datetime, timedelta, timezone
+from db import notification_outbox
+
+OUTBOX_RETENTION = timedelta(days=1)  # бот так долго лежал — уже неактуально
+
+
+async def publish(messages):
+    """messages — словари chat_id, text, lots; одной пачкой."""
+    if not messages:
+        return
+    now = datetime.now(timezone.utc)
+    await notification_outbox.insert_many(
+        [
+            {
+                **message,
+                "created_at": now,
+                "claimed_until": now,
+                "expire_at": now + OUTBOX_RETENTION,
+            }
+            for message in messages
+        ],
+        ordered=False,
+    )
+
+
+async def claim(consumer_id, limit, lease_seconds):
+    """
+    Забираем до limit старых сообщений на lease_seconds. Не подтверждённые
+    за это время (бот упал) снова станут доступны другому потребителю.
+    """
+    now = datetime.now(timezone.utc)
+    ids = [
+        doc["_id"]
+        async for doc in notification_outbox.find(
+            {"claimed_until": {"$lte": now}}, {"_id": 1}
+        )
+        .sort("created_at", 1)
+        .limit(limit)
+    ]
+    if not ids:
+        return []
+    # Условие повторяем, чтобы не перехватить то, что уже забрал другой
+    await notification_outbox.update_many(
+        {"_id": {"$in": ids}, "claimed_until": {"$lte": now}},
+        {
+            "$set": {
+                "claimed_by": consumer_id,
+                "claimed_until": now + timedelta(seconds=lease_seconds),
+            }
+        },
+    )
+    return (
+        await notification_outbox.find({"_id": {"$in": ids}, "claimed_by": consumer_id})
+        .sort("created_at", 1)
+        .to_list(None)
+    )
+
+
+async def ack(ids):
+    if ids:
+        await notification_outbox.delete_many({"_id": {"$in": list(ids)}})
+
+
+async def pending_count():
+    return await notification_outbox.count_documents({})
@@ -0,0 +1,28 @@
+# stalcraft_bot/repositories/poller_leases.py
+
+from datetime import datetime, timedelta, timezone
+from db import poller_leases
+
+
+async def heartbeat(worker_id, ttl):
+    """Продлеваем аренду воркера опроса на ttl секунд."""
+    now = datetime.now(timezone.utc)
+    await poller_leases.update_one(
+        {"_id": worker_id},
+        {
+            "$set": {"heartbeat_at": now, "expire_at": now + timedelta(seconds=ttl)},
+            "$setOnInsert": {"started_at": now},
+        },
+        upsert=True,
+    )
+
+
+async def list_live():
+    """ID воркеров, чья аренда ещё не истекла."""
+    now = datetime.now(timezone.utc)
+    cursor = poller_leases.find({"expire_at": {"$gt": now}}, {"_id": 1})
+    return sorted([doc["_id"] async for doc in cursor])
+
+
+async def release(worker_id):
+    await poller_leases.delete_one({"_id": worker_id})
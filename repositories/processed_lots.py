@@ -0,0 +1,69 @@
+# stalcraft_bot/repositories/processed_lots.py
+
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from db import db, processed_lots
+
+
+async def load_notified_users(keys):
+    """Для каждого ключа лота (item_id, start_time, end_time) — кому уже писали."""
+    if not keys:
+        return {}
+    cursor = processed_lots.find(
+        {
+            "$or": [
+                {"item_id": item_id, "start_time": start_time, "end_time": end_time}
+                for item_id, start_time, end_time in keys
+            ]
+        },
+        {"_id": 0, "item_id": 1, "start_time": 1, "end_time": 1, "notified_users": 1},
+    )
+    notified = {}
+    async for doc in cursor:
+        key = (doc["item_id"], doc.get("start_time"), doc["end_time"])
+        notified.setdefault(key, set()).update(doc.get("notified_users", []))
+    return notified
+
+
+async def save_notified_users(new_notified):
+    """Один bulk_write на все уведомления: документ на лот, $addToSet юзеров."""
+    if not new_notified:
+        return
+    now = datetime.now(timezone.utc)
+    await processed_lots.bulk_write(
+        [
+            UpdateOne(
+                {"item_id": item_id, "start_time": start_time, "end_time": end_time},
+                {
+                    "$addToSet": {"notified_users": {"$each": list(user_ids)}},
+                    "$setOnInsert": {
+                        "created_at": now,
+                        # Запись больше не нужна, как только лот закончился
+                        "expire_at": datetime.fromisoformat(
+                            end_time.replace("Z", "+00:00")
+                        ),
+                    },
+                },
+                upsert=True,
+            )
+            for (item_id, start_time, end_time), user_ids in new_notified.items()
+        ],
+        ordered=False,
+    )
+
+
+async def stats():
+    """Размер processed_lots для админа."""
+    try:
+        result = await db.command("collStats", "processed_lots")
+        return {
+            "count": result.get("count", 0),
+            "size": result.get("size", 0),
+            "index_size": result.get("totalIndexSize", 0),
+        }
+    except Exception:
+        return {
+            "count": await processed_lots.estimated_document_count(),
+            "size": None,
+            "index_size": None,
+        }
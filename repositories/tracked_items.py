@@ -0,0 +1,101 @@
+# stalcraft_bot/repositories/tracked_items.py
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from db import tracked_items
+from services.tracked_cache import tracked_cache
+
+
+async def find_by_id(_id):
+    return await tracked_items.find_one({"_id": ObjectId(_id)})
+
+
+async def list_by_user(user_id):
+    return await tracked_items.find({"user_id": user_id}).to_list(None)
+
+
+async def list_active():
+    """Все фильтры с включёнными уведомлениями."""
+    return await tracked_items.find({"notify": True}).to_list(None)
+
+
+async def _refresh_cache(ids):
+    """Перечитываем изменённые фильтры в кэш цикла опроса."""
+    found = await tracked_items.find({"_id": {"$in": ids}}).to_list(None)
+    for doc in found:
+        tracked_cache.upsert(doc)
+    for _id in set(ids) - {doc["_id"] for doc in found}:
+        tracked_cache.remove(_id)
+
+
+async def add(document):
+    await tracked_items.insert_one(document)
+    # insert_one дописывает _id в document
+    tracked_cache.upsert(document)
+
+
+async def update_fields(_id, fields):
+    # rev растёт при каждой правке — по нему видно, что фильтр меняли
+    await tracked_items.update_one(
+        {"_id": ObjectId(_id)}, {"$set": fields, "$inc": {"rev": 1}}
+    )
+    await _refresh_cache([ObjectId(_id)])
+
+
+async def unset_fields(_id, fields):
+    await tracked_items.update_one(
+        {"_id": ObjectId(_id)},
+        {"$unset": {field: "" for field in fields}, "$inc": {"rev": 1}},
+    )
+    await _refresh_cache([ObjectId(_id)])
+
+
+async def set_notify_for_user(user_id, notify):
+    """Вкл/выкл уведомления для всех фильтров пользователя, возвращает их число."""
+    fields = {"notify": notify}
+    # При включении — глубокая проверка, как для нового фильтра
+    if notify:
+        fields["first_check"] = True
+    # Только те, где что-то меняется: иначе $inc rev засчитал бы в
+    # modified_count и фильтры, уже бывшие в этом состоянии
+    result = await tracked_items.update_many(
+        {
+            "user_id": user_id,
+            "$or": [{field: {"$ne": value}} for field, value in fields.items()],
+        },
+        {"$set": fields, "$inc": {"rev": 1}},
+    )
+    tracked_cache.replace_user(user_id, await list_by_user(user_id))
+    return result.modified_count
+
+
+async def clear_first_check(filters):
+    """
+    Глубокая проверка этих фильтров выполнена. Снимаем first_check, только
+    если фильтр не правили, пока она шла (rev тот же, что в снимке).
+    """
+    if not filters:
+        return
+    await tracked_items.bulk_write(
+        [
+            UpdateOne(
+                {"_id": f["_id"], "rev": f.get("rev"), "first_check": True},
+                {"$set": {"first_check": False}},
+            )
+            for f in filters
+        ],
+        ordered=False,
+    )
+    await _refresh_cache([f["_id"] for f in filters])
+
+
+async def delete_by_id(_id):
+    await tracked_items.delete_one({"_id": ObjectId(_id)})
+    tracked_cache.remove(ObjectId(_id))
+
+
+async def delete_by_user(user_id):
+    """Удаляет все фильтры пользователя, возвращает их число."""
+    result = await tracked_items.delete_many({"user_id": user_id})
+    tracked_cache.replace_user(user_id, [])
+    return result.deleted_count
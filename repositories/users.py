@@ -0,0 +1,89 @@
+# stalcraft_bot/repositories/users.py
+
+from db import users_collection
+
+
+async def find_by_user_id(user_id):
+    return await users_collection.find_one({"user_id": user_id})
+
+
+async def find_by_id(_id):
+    return await users_collection.find_one({"_id": _id})
+
+
+async def find_by_login(login):
+    return await users_collection.find_one({"login": login})
+
+
+async def find_by_credentials(login, password):
+    return await users_collection.find_one({"login": login, "password": password})
+
+
+async def find_by_identifier(identifier):
+    """Поиск по логину или Telegram ID (строкой из сообщения)."""
+    query = {"$or": [{"login": identifier}, {"user_id": identifier}]}
+    if identifier.isdigit():
+        query["$or"].append({"user_id": int(identifier)})
+    return await users_collection.find_one(query)
+
+
+async def list_all():
+    return await users_collection.find().to_list(None)
+
+
+async def list_for_subscription_check(today):
+    """Пользователи, которых не откладывали на контроль после today."""
+    return await users_collection.find(
+        {
+            "reg_date": {"$exists": True},
+            "$or": [
+                {"pending_control_until": {"$exists": False}},
+                {"pending_control_until": None},
+                {"pending_control_until": {"$lt": today}},
+            ],
+        }
+    ).to_list(None)
+
+
+async def distinct_user_ids():
+    return await users_collection.distinct("user_id")
+
+
+async def create(document):
+    await users_collection.insert_one(document)
+
+
+async def bind_user_id(login, user_id):
+    await users_collection.update_one({"login": login}, {"$set": {"user_id": user_id}})
+
+
+async def set_max_items(_id, max_items):
+    """Возвращает True, если лимит действительно изменился."""
+    result = await users_collection.update_one(
+        {"_id": _id}, {"$set": {"max_items": max_items}}
+    )
+    return result.modified_count > 0
+
+
+async def change_current_items(user_id, delta):
+    await users_collection.update_one(
+        {"user_id": user_id}, {"$inc": {"current_items": delta}}
+    )
+
+
+async def reset_current_items(user_id):
+    await users_collection.update_one(
+        {"user_id": user_id}, {"$set": {"current_items": 0}}
+    )
+
+
+async def update_by_id(_id, fields):
+    await users_collection.update_one({"_id": _id}, {"$set": fields})
+
+
+async def update_by_login(login, fields):
+    await users_collection.update_one({"login": login}, {"$set": fields})
+
+
+async def delete_by_id(_id):
+    await users_collection.delete_one({"_id": _id})
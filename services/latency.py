@@ -0,0 +1,82 @@
+# stalcraft_bot/services/latency.py
+
+from collections import deque
+from datetime import datetime, timezone
+from services.metrics import Histogram
+
+SAMPLES_PER_ITEM = 500  # последние замеры на item_id и этап
+
+DETECTION_SECONDS = Histogram(
+    "detection_latency_seconds",
+    "От startTime лота до совпадения (match) и до доставки (delivered)",
+    labels=("stage",),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+
+def _percentile(sorted_values, p):
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Задержка обнаружения лотов: сколько прошло с выставления до уведомления."""
+
+    def __init__(self):
+        self.samples = {}  # (item_id, stage) -> deque секунд
+        self.names = {}  # item_id -> название для /stats
+
+    def record(self, stage, item_id, start_time, name=None, at=None):
+        """at — когда произошло событие, если не сейчас (match из outbox)."""
+        if not start_time:
+            return
+        try:
+            started = datetime.fromisoformat(start_time.replace("Z", "+00:00"))
+        except ValueError:
+            return
+        if at is None:
+            at = datetime.now(timezone.utc)
+        elif at.tzinfo is None:
+            # pymongo без tz_aware отдаёт даты как naive UTC
+            at = at.replace(tzinfo=timezone.utc)
+        seconds = (at - started).total_seconds()
+        DETECTION_SECONDS.observe(seconds, stage=stage)
+        key = (item_id, stage)
+        if key not in self.samples:
+            self.samples[key] = deque(maxlen=SAMPLES_PER_ITEM)
+        self.samples[key].append(seconds)
+        if name:
+            self.names[item_id] = name
+
+    def percentiles(self, item_id, stage):
+        values = self.samples.get((item_id, stage))
+        if not values:
+            return None
+        values = sorted(values)
+        return {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+        }
+
+    def summary(self, limit=10):
+        """item_id с наибольшим числом доставок и их перцентили по этапам."""
+        item_ids = {item_id for item_id, _ in self.samples}
+        top = sorted(
+            item_ids,
+            key=lambda item_id: len(self.samples.get((item_id, "delivered"), ())),
+            reverse=True,
+        )[:limit]
+        return [
+            {
+                "item_id": item_id,
+                "name": self.names.get(item_id, item_id),
+                "match": self.percentiles(item_id, "match"),
+                "delivered": self.percentiles(item_id, "delivered"),
+            }
+            for item_id in top
+        ]
+
+
+detection_latency = LatencyTracker()
@@ -0,0 +1,84 @@
+# stalcraft_bot/services/lot_parser.py
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    import json
+
+    loads = json.loads
+
+
+class Lot:
+    """Только те поля лота, которые нужны для поиска и уведомлений."""
+
+    __slots__ = (
+        "item_id",
+        "amount",
+        "start_price",
+        "current_price",
+        "buyout_price",
+        "start_time",
+        "end_time",
+        "qlt",
+        "stats_random",
+    )
+
+    def __init__(
+        self,
+        item_id,
+        amount,
+        start_price,
+        current_price,
+        buyout_price,
+        start_time,
+        end_time,
+        qlt,
+        stats_random,
+    ):
+        self.item_id = item_id
+        self.amount = amount
+        self.start_price = start_price
+        self.current_price = current_price
+        self.buyout_price = buyout_price
+        self.start_time = start_time
+        self.end_time = end_time
+        self.qlt = qlt
+        self.stats_random = stats_random
+
+    @classmethod
+    def from_json(cls, raw):
+        """Лот из JSON API или None, если не хватает обязательных полей."""
+        try:
+            item_id = raw["itemId"]
+            amount = raw["amount"]
+            start_price = raw["startPrice"]
+            end_time = raw["endTime"]
+        except KeyError:
+            return None
+        add = raw.get("additional") or {}
+        return cls(
+            item_id,
+            amount,
+            start_price,
+            raw.get("currentPrice", 0),
+            raw.get("buyoutPrice", 0),
+            raw.get("startTime"),
+            end_time,
+            add.get("qlt", 0),
+            add.get("stats_random"),
+        )
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def parse_lots(content):
+    """Разбираем ответ /auction/{item}/lots в список Lot (orjson, если установлен)."""
+    lots = []
+    for raw in loads(content).get("lots", []):
+        lot = Lot.from_json(raw)
+        if lot is not None:
+            lots.append(lot)
+    return lots
@@ -0,0 +1,51 @@
+# stalcraft_bot/services/matcher.py
+
+from bisect import bisect_left
+
+
+class _PriceBucket:
+    """Фильтры, отсортированные по порогу цены."""
+
+    __slots__ = ("filters", "prices")
+
+    def __init__(self, filters):
+        self.filters = sorted(filters, key=lambda f: f["price"])
+        self.prices = [f["price"] for f in self.filters]
+
+    def candidates(self, price_per_unit):
+        # Подходят только фильтры с порогом >= цены за штуку
+        return self.filters[bisect_left(self.prices, price_per_unit) :]
+
+
+class FilterIndex:
+    """
+    Фильтры одного item_id, собранные для быстрого сопоставления с лотами:
+    товары — по цене, артефакты — по редкости, внутри — по цене.
+    """
+
+    def __init__(self, filters):
+        self.items = _PriceBucket([f for f in filters if f["type"] == "item"])
+        by_rarity = {}
+        for f in filters:
+            if f["type"] == "artifact":
+                by_rarity.setdefault(f["rarity"], []).append(f)
+        self.artifacts = {
+            rarity: _PriceBucket(group) for rarity, group in by_rarity.items()
+        }
+
+    def match(self, price_per_unit, amount, rarity, percent):
+        """Фильтры, которым удовлетворяет лот."""
+        for filter_ in self.items.candidates(price_per_unit):
+            if amount >= filter_["min_count"]:
+                yield filter_
+
+        bucket = self.artifacts.get(rarity)
+        if bucket is None:
+            return
+        for filter_ in bucket.candidates(price_per_unit):
+            min_p = filter_.get("min_percent")
+            max_p = filter_.get("max_percent")
+            if min_p is not None and max_p is not None:
+                if percent is None or not (min_p <= percent <= max_p):
+                    continue
+            yield filter_
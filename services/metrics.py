@@ -0,0 +1,179 @@
+# stalcraft_bot/services/metrics.py
+
+import asyncio
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+registry = []
+
+
+def _labels_str(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, help_, labels=()):
+        self.name = name
+        self.help = help_
+        self.labels = labels
+        self.values = {}
+        registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels_str(self.labels, key)} {value}"
+
+
+class Gauge:
+    """Значение считается при каждом запросе /metrics."""
+
+    def __init__(self, name, help_):
+        self.name = name
+        self.help = help_
+        self.function = None
+        registry.append(self)
+
+    def set_function(self, function):
+        self.function = function
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        if self.function is not None:
+            yield f"{self.name} {self.function()}"
+
+
+class Histogram:
+    def __init__(self, name, help_, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_
+        self.labels = labels
+        self.buckets = buckets
+        self.values = {}  # labels -> [counts по бакетам, sum, count]
+        registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[name]) for name in self.labels)
+        state = self.values.get(key)
+        if state is None:
+            state = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[0][i] += 1
+        state[1] += value
+        state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, (counts, total, count) in self.values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                labels = _labels_str(self.labels + ("le",), key + (str(bound),))
+                yield f"{self.name}_bucket{labels} {bucket_count}"
+            labels = _labels_str(self.labels + ("le",), key + ("+Inf",))
+            yield f"{self.name}_bucket{labels} {count}"
+            labels = _labels_str(self.labels, key)
+            yield f"{self.name}_sum{labels} {total}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+def render():
+    lines = []
+    for metric in registry:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+# Метрики опроса аукциона
+STAGE_SECONDS = Histogram(
+    "poller_stage_seconds",
+    "Время этапа обработки: fetch, parse, dedup, match, send",
+    labels=("stage",),
+)
+POLL_SECONDS = Histogram(
+    "poller_poll_seconds", "Полное время опроса одного item_id", labels=("job",)
+)
+POLLS_TOTAL = Counter(
+    "poller_polls_total", "Опросы item_id по результату", labels=("job", "result")
+)
+API_REQUESTS_TOTAL = Counter(
+    "stalcraft_api_requests_total", "Запросы к API по коду ответа", labels=("status",)
+)
+API_LATENCY_SECONDS = Histogram(
+    "stalcraft_api_latency_seconds", "Время ответа API на запрос лотов"
+)
+LOTS_TOTAL = Counter("poller_lots_total", "Обработано лотов")
+NOTIFICATIONS_TOTAL = Counter(
+    "notifier_messages_total", "Отправка сообщений по результату", labels=("result",)
+)
+POLL_QUEUE_DEPTH = Gauge("poller_queue_depth", "Задач в очереди опроса")
+NOTIFY_QUEUE_DEPTH = Gauge("notifier_queue_depth", "Сообщений в очереди отправки")
+
+
+_server = None
+
+
+async def _handle(reader, writer):
+    try:
+        request_line = await reader.readline()
+        # Заголовки запроса не нужны, но их надо дочитать
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[1] == "/metrics":
+            body = render().encode()
+            status = "200 OK"
+        else:
+            body = b"Not Found\n"
+            status = "404 Not Found"
+        writer.write(
+            f"HTTP/1.1 {status}\r\n"
+            f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: close\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host, port):
+    """Локальный HTTP /metrics в формате Prometheus (вызывается из post_init)."""
+    global _server
+    if _server is None:
+        try:
+            _server = await asyncio.start_server(_handle, host, port)
+        except OSError as e:
+            # Порт занят (бот и воркер опроса на одном METRICS_PORT) — работаем
+            # дальше, только без /metrics
+            print(f"[ERROR] Metrics server on {host}:{port} not started: {e}")
+            return
+        print(f"[INFO] Metrics on http://{host}:{port}/metrics")
+
+
+async def stop_metrics_server():
+    global _server
+    if _server is not None:
+        _server.close()
+        await _server.wait_closed()
+        _server = None
@@ -0,0 +1,120 @@
+# stalcraft_bot/services/notifier.py
+
+import asyncio
+from collections import deque
+from telegram.error import RetryAfter
+from services.latency import detection_latency
+from services.metrics import NOTIFICATIONS_TOTAL, NOTIFY_QUEUE_DEPTH, STAGE_SECONDS
+from utils.rate_limiter import TokenBucket
+
+SEND_WORKERS = 4
+GLOBAL_RATE = 25  # сообщений в секунду на бота (лимит Telegram ~30)
+PER_CHAT_RATE = 1  # сообщений в секунду в один чат
+MAX_RETRIES = 3
+
+
+class Notifier:
+    """
+    Очередь исходящих сообщений: поиск лотов только кладёт текст в очередь,
+    а воркеры отправляют его с учётом лимитов Telegram. Сообщения копятся
+    по чатам, и воркер берёт только чат, которому уже можно писать, —
+    пользователь с десятком сообщений не держит воркеров остальных чатов.
+    """
+
+    def __init__(self):
+        # chat_id -> deque сообщений; чат здесь, пока ему есть что слать
+        # или не прошла пауза PER_CHAT_RATE после последней отправки
+        self.pending = {}
+        self.ready = asyncio.Queue()  # чаты, которым можно писать прямо сейчас
+        self._size = 0
+        NOTIFY_QUEUE_DEPTH.set_function(self.qsize)
+        self.global_limiter = TokenBucket(rate=GLOBAL_RATE, burst=GLOBAL_RATE)
+        self.workers = []
+        self.bot = None
+
+    def start(self, bot):
+        self.bot = bot
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(SEND_WORKERS)
+        ]
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    def enqueue(self, chat_id, text, lots=(), on_done=None, matched_at=None):
+        """
+        lots — (item_id, startTime, название) лотов из сообщения, для замера
+        задержки: совпадение считаем здесь (или в matched_at, если лот нашёл
+        другой процесс), доставку — после отправки.
+        on_done вызывается, когда с сообщением покончено: отправлено или брошено.
+        """
+        for item_id, start_time, name in lots:
+            detection_latency.record("match", item_id, start_time, name, matched_at)
+        messages = self.pending.get(chat_id)
+        if messages is None:
+            messages = self.pending[chat_id] = deque()
+            self.ready.put_nowait(chat_id)
+        messages.append((text, lots, 0, on_done))
+        self._size += 1
+
+    async def flush(self):
+        """Сообщения уже в очереди этого процесса — ждать нечего (см. outbox)."""
+
+    def qsize(self):
+        """Сообщений ждут отправки."""
+        return self._size
+
+    def _release(self, chat_id):
+        """Пауза чата прошла: отдаём его воркерам или забываем, если пусто."""
+        if self.pending.get(chat_id):
+            self.ready.put_nowait(chat_id)
+        else:
+            self.pending.pop(chat_id, None)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            chat_id = await self.ready.get()
+            text, lots, attempt, on_done = self.pending[chat_id].popleft()
+            self._size -= 1
+            try:
+                await self._send(chat_id, text, lots, attempt, on_done)
+            finally:
+                # Следующее сообщение в этот чат — не раньше 1 / PER_CHAT_RATE
+                loop.call_later(1 / PER_CHAT_RATE, self._release, chat_id)
+
+    async def _send(self, chat_id, text, lots, attempt, on_done):
+        await self.global_limiter.acquire()
+        try:
+            with STAGE_SECONDS.time(stage="send"):
+                await self.bot.send_message(chat_id=chat_id, text=text)
+            NOTIFICATIONS_TOTAL.inc(result="sent")
+            for item_id, start_time, name in lots:
+                detection_latency.record("delivered", item_id, start_time, name)
+            print(f"[INFO] Notification sent to {chat_id}")
+        except asyncio.CancelledError:
+            raise
+        except RetryAfter as e:
+            # Flood control: притормаживаем всю отправку и повторяем позже
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):
+                retry_after = retry_after.total_seconds()
+            self.global_limiter.pause(retry_after)
+            NOTIFICATIONS_TOTAL.inc(result="retry_after")
+            if attempt < MAX_RETRIES:
+                # Обратно в начало очереди чата, порядок сообщений сохраняется
+                self.pending[chat_id].appendleft((text, lots, attempt + 1, on_done))
+                self._size += 1
+                return
+            print(f"[ERROR] Notification to {chat_id} dropped after retries")
+        except Exception as e:
+            NOTIFICATIONS_TOTAL.inc(result="failed")
+            print(f"[ERROR] Failed to send notification: {e}")
+        if on_done is not None:
+            on_done()
+
+
+notifier = Notifier()
@@ -0,0 +1,154 @@
+# stalcraft_bot/services/outbox.py
+
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from repositories import notification_outbox
+
+FLUSH_INTERVAL = 0.5  # секунд — как часто процесс опроса пишет пачку в Mongo
+POLL_INTERVAL = 1  # секунд между проверками outbox, когда он пуст
+CLAIM_BATCH = 50  # сообщений за один заход
+CLAIM_LEASE = 300  # секунд на отправку, потом сообщение заберут снова
+MAX_LOCAL_BACKLOG = 100  # не забираем больше, пока очередь notifier не разгрузится
+
+
+class OutboxPublisher:
+    """
+    Сторона процесса опроса: тот же enqueue, что у notifier, но сообщения
+    копятся в буфере и пачками уходят в коллекцию notification_outbox.
+    """
+
+    def __init__(self):
+        self.buffer = []
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            pass  # уже напечатано в flush
+
+    def enqueue(self, chat_id, text, lots=()):
+        # Задержку совпадения запишет бот — по matched_at, а не по времени чтения
+        self.buffer.append(
+            {
+                "chat_id": chat_id,
+                "text": text,
+                "lots": [list(lot) for lot in lots],
+                "matched_at": datetime.now(timezone.utc),
+            }
+        )
+
+    async def flush(self):
+        """
+        Пишем буфер в Mongo. Под локом: вернувшись отсюда, вызывающий знает,
+        что и его сообщения, и чужая пачка в полёте уже записаны. При ошибке
+        пачка остаётся в буфере, а исключение уходит вызывающему.
+        """
+        async with self._lock:
+            batch, self.buffer = self.buffer, []
+            try:
+                await notification_outbox.publish(batch)
+            except Exception as e:
+                # Mongo недоступна — вернём пачку в начало и попробуем позже
+                self.buffer[:0] = batch
+                print(f"[ERROR] Outbox publish failed: {e}")
+                raise
+
+    async def _flush_loop(self):
+        # Подстраховка: обычно буфер пишет сам process_auction_data
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass  # уже напечатано в flush
+
+
+class OutboxConsumer:
+    """
+    Сторона бота: забирает сообщения из outbox в очередь notifier и удаляет
+    их после отправки. Упал бот до отправки — сообщения вернутся через
+    CLAIM_LEASE секунд.
+    """
+
+    def __init__(self, notifier):
+        self.notifier = notifier
+        self.consumer_id = (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        )
+        self.done = set()  # _id отправленных (или окончательно не отправленных)
+        # _id, которые ещё ждут в очереди notifier. Пролежат дольше CLAIM_LEASE
+        # (RetryAfter, занятый чат) — claim вернёт их нам же, второй раз не шлём
+        self.queued = set()
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._consume_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._ack()
+
+    async def _ack(self):
+        done, self.done = self.done, set()
+        try:
+            await notification_outbox.ack(done)
+        except Exception as e:
+            self.done |= done
+            print(f"[ERROR] Outbox ack failed: {e}")
+
+    def _on_done(self, _id):
+        self.queued.discard(_id)
+        self.done.add(_id)
+
+    async def _consume_loop(self):
+        while True:
+            claimed = []
+            try:
+                await self._ack()
+                # Telegram не успевает — пусть сообщения подождут в Mongo
+                if self.notifier.qsize() < MAX_LOCAL_BACKLOG:
+                    claimed = await notification_outbox.claim(
+                        self.consumer_id, CLAIM_BATCH, CLAIM_LEASE
+                    )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Outbox consume failed: {e}")
+
+            for doc in claimed:
+                if doc["_id"] in self.queued:
+                    continue
+                self.queued.add(doc["_id"])
+                # Записи старого формата — без названия предмета
+                lots = [(*lot, None)[:3] for lot in doc.get("lots", ())]
+                self.notifier.enqueue(
+                    doc["chat_id"],
+                    doc["text"],
+                    lots,
+                    on_done=lambda _id=doc["_id"]: self._on_done(_id),
+                    matched_at=doc.get("matched_at"),
+                )
+            if len(claimed) < CLAIM_BATCH:
+                await asyncio.sleep(POLL_INTERVAL)
+
+
+outbox_publisher = OutboxPublisher()
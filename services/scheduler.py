@@ -0,0 +1,116 @@
+# stalcraft_bot/services/scheduler.py
+
+import time
+from datetime import datetime, timezone
+
+MIN_POLL_INTERVAL = 5  # секунд — «горячие» предметы
+MAX_POLL_INTERVAL = 300  # секунд — предметы без движения
+CHURN_WEIGHT = 4  # вклад новых лотов за опрос
+FILTER_WEIGHT = 1  # вклад каждого фильтра на item_id
+ENDING_WEIGHT = 20  # вклад лота, который заканчивается в окне ставок
+
+
+class ItemState:
+    __slots__ = (
+        "next_poll",
+        "in_flight",
+        "filters",
+        "churn",
+        "lot_keys",
+        "interval",
+        "cost",
+    )
+
+    def __init__(self, now):
+        self.next_poll = now
+        self.in_flight = False
+        self.filters = 0
+        self.churn = 0.0
+        self.lot_keys = None
+        self.interval = MIN_POLL_INTERVAL
+        self.cost = 1  # запросов к API за опрос
+
+
+class PollScheduler:
+    """
+    Решает, когда опрашивать каждый item_id: чем больше фильтров, оборот лотов
+    и лотов с окончанием в окне ставок — тем чаще. Суммарная частота
+    подрезается под бюджет запросов API.
+    """
+
+    def __init__(self, requests_per_sec, track_window_minutes):
+        self.requests_per_sec = requests_per_sec
+        self.track_window = track_window_minutes * 60
+        self.items = {}
+
+    def sync(self, items_by_id):
+        """Синхронизируем список item_id с текущими фильтрами."""
+        now = time.monotonic()
+        for item_id in list(self.items):
+            if item_id not in items_by_id:
+                del self.items[item_id]
+
+        for item_id, filters in items_by_id.items():
+            state = self.items.get(item_id)
+            if state is None:
+                state = self.items[item_id] = ItemState(now)
+            state.filters = len(filters)
+
+    def pop_due(self):
+        """item_id, которые пора опрашивать, самые просроченные первыми."""
+        now = time.monotonic()
+        due = [
+            (state.next_poll, item_id)
+            for item_id, state in self.items.items()
+            if not state.in_flight and state.next_poll <= now
+        ]
+        due.sort()
+        for _, item_id in due:
+            self.items[item_id].in_flight = True
+        return [item_id for _, item_id in due]
+
+    def record(self, item_id, lots, requests=1):
+        """Пересчитываем интервал по результатам опроса (requests — его цена в API)."""
+        state = self.items.get(item_id)
+        if state is None:
+            return
+
+        lot_keys = {(lot.start_time, lot.end_time, lot.amount) for lot in lots}
+        new_lots = len(lot_keys - state.lot_keys) if state.lot_keys is not None else 0
+        state.lot_keys = lot_keys
+        state.cost = max(1, requests)
+        state.churn = 0.5 * state.churn + 0.5 * new_lots
+
+        score = 1 + state.churn * CHURN_WEIGHT + state.filters * FILTER_WEIGHT
+        if self._ending_soon(lots):
+            score += ENDING_WEIGHT
+
+        state.interval = min(
+            MAX_POLL_INTERVAL, max(MIN_POLL_INTERVAL, MAX_POLL_INTERVAL / score)
+        )
+        state.next_poll = time.monotonic() + state.interval * self._load_factor()
+        state.in_flight = False
+
+    def retry_later(self, item_id, delay=MIN_POLL_INTERVAL):
+        state = self.items.get(item_id)
+        if state is None:
+            return
+        state.next_poll = time.monotonic() + delay
+        state.in_flight = False
+
+    def _ending_soon(self, lots):
+        now = datetime.now(timezone.utc)
+        for lot in lots:
+            try:
+                end_time = datetime.fromisoformat(lot.end_time.replace("Z", "+00:00"))
+            except Exception:
+                continue
+            if 0 < (end_time - now).total_seconds() <= self.track_window:
+                return True
+        return False
+
+    def _load_factor(self):
+        # Если желаемая частота опросов больше бюджета — растягиваем интервалы
+        demand = sum(state.cost / state.interval for state in self.items.values())
+        budget = self.requests_per_sec * 0.9
+        return max(1.0, demand / budget) if budget > 0 else 1.0
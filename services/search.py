@@ -6,37 +6,90 @@ from config import ITEMS_PATH
 from rapidfuzz import process
 
 
-def load_item_by_name(name, type_="item"):
-    """Ищем товары или артефакты с учётом опечаток."""
-    items = []
+class ItemCatalog:
+    """Каталог товаров и артефактов в памяти, строится один раз при старте."""
 
-    base_path = ITEMS_PATH
-    if type_ == "artifact":
-        base_path = os.path.join(ITEMS_PATH, "artefact")
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.partitions = {}
+        self.loaded = False
 
-    for root, dirs, files in os.walk(base_path):
-        # Исключаем артефакты при поиске обычных товаров
-        if type_ == "item" and "artefact" in root.lower():
-            continue
+    def load(self):
+        items_by_type = {"item": [], "artifact": []}
 
-        for file in files:
-            if file.endswith(".json"):
+        for root, dirs, files in os.walk(self.base_path):
+            # Артефакты лежат в отдельной папке — кладём их в свой раздел
+            rel_root = os.path.relpath(root, self.base_path).lower()
+            type_ = "artifact" if "artefact" in rel_root else "item"
+
+            for file in files:
+                if not file.endswith(".json"):
+                    continue
                 with open(os.path.join(root, file), "r", encoding="utf-8") as f:
                     item_data = json.load(f)
-                    item_name = item_data["name"]["lines"]["ru"]
-                    synonyms = item_data.get("synonyms", [])
-                    items.append(
-                        {"name": item_name, "synonyms": synonyms, "data": item_data}
-                    )
-
-    names = [item["name"] for item in items] + [
-        syn for item in items for syn in item["synonyms"]
-    ]
-    results = process.extract(name, names, limit=10, score_cutoff=70)
-
-    found_items = []
-    for match_name, score, index in results:
-        matched_item = items[index // (len(names) // len(items))]["data"]
-        found_items.append({"name": match_name, "score": score, "data": matched_item})
-
-    return found_items
+                items_by_type[type_].append(
+                    {
+                        "name": item_data["name"]["lines"]["ru"],
+                        "synonyms": item_data.get("synonyms", []),
+                        "data": item_data,
+                    }
+                )
+
+        partitions = {}
+        for type_, items in items_by_type.items():
+            # Плоский список названий и синонимов + индекс предмета для каждого
+            names = []
+            owners = []
+            for i, item in enumerate(items):
+                for variant in [item["name"], *item["synonyms"]]:
+                    names.append(variant)
+                    owners.append(i)
+            partitions[type_] = {"items": items, "names": names, "owners": owners}
+
+        self.partitions = partitions
+        self.loaded = True
+        print(
+            f"[INFO] Item catalog loaded: {len(partitions['item']['items'])} items, "
+            f"{len(partitions['artifact']['items'])} artifacts"
+        )
+
+    def reload(self):
+        """Перечитываем базу предметов (после обновления файлов в ITEMS_PATH)."""
+        self.load()
+
+    def search(self, name, type_="item", limit=10, score_cutoff=70):
+        if not self.loaded:
+            self.load()
+
+        partition = self.partitions.get(type_, self.partitions["item"])
+        items = partition["items"]
+        names = partition["names"]
+        owners = partition["owners"]
+        if not items:
+            return []
+
+        # Берём все совпадения выше порога (отсортированы по score),
+        # чтобы после схлопывания синонимов осталось до limit предметов
+        results = process.extract(name, names, limit=None, score_cutoff=score_cutoff)
+
+        found_items = []
+        seen = set()
+        for match_name, score, index in results:
+            owner = owners[index]
+            if owner in seen:
+                continue
+            seen.add(owner)
+            found_items.append(
+                {"name": match_name, "score": score, "data": items[owner]["data"]}
+            )
+            if len(found_items) >= limit:
+                break
+        return found_items
+
+
+catalog = ItemCatalog(ITEMS_PATH)
+
+
+def load_item_by_name(name, type_="item"):
+    """Ищем товары или артефакты с учётом опечаток."""
+    return catalog.search(name, type_)
@@ -0,0 +1,92 @@
+# stalcraft_bot/services/sharding.py
+
+import asyncio
+import bisect
+import hashlib
+import os
+import socket
+import time
+import uuid
+from repositories import poller_leases
+
+LEASE_TTL = 20  # секунд без heartbeat — воркер считается упавшим
+HEARTBEAT_INTERVAL = 5  # секунд между продлениями аренды
+VIRTUAL_NODES = 64  # точек на кольце на воркера, для ровного деления
+
+
+def _hash(value):
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class HashRing:
+    """Консистентное хеширование: при уходе воркера переезжают только его item_id."""
+
+    def __init__(self, workers):
+        self.workers = tuple(workers)
+        points = sorted(
+            (_hash(f"{worker}#{i}"), worker)
+            for worker in self.workers
+            for i in range(VIRTUAL_NODES)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [w for _, w in points]
+
+    def owner(self, key):
+        if not self._hashes:
+            return None
+        i = bisect.bisect(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[i]
+
+
+class ShardLease:
+    """
+    Аренда шарда item_id в коллекции poller_leases. Каждый процесс опроса
+    продлевает свою запись, а по списку живых воркеров строит одно и то же
+    кольцо, поэтому item_id делятся без координатора. Упавший воркер
+    пропадает из списка через LEASE_TTL, и его item_id забирают остальные.
+    """
+
+    def __init__(self, worker_id=None, on_rebalance=None):
+        self.worker_id = worker_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        )
+        self.ring = HashRing([self.worker_id])
+        self.on_rebalance = on_rebalance  # вызывается с числом живых воркеров
+        self._renewed_at = None  # monotonic последнего удачного heartbeat
+
+    async def heartbeat(self):
+        await poller_leases.heartbeat(self.worker_id, LEASE_TTL)
+        self._renewed_at = time.monotonic()
+        workers = await poller_leases.list_live()
+        if self.worker_id not in workers:
+            workers = sorted([*workers, self.worker_id])
+        if tuple(workers) != self.ring.workers:
+            print(f"[INFO] Poller shard: {len(workers)} workers, rebalancing")
+            self.ring = HashRing(workers)
+            if self.on_rebalance is not None:
+                self.on_rebalance(len(workers))
+
+    async def run(self):
+        while True:
+            try:
+                await self.heartbeat()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Poller lease heartbeat failed: {e}")
+            await asyncio.sleep(HEARTBEAT_INTERVAL)
+
+    async def release(self):
+        """Освобождаем шард сразу, не дожидаясь LEASE_TTL."""
+        await poller_leases.release(self.worker_id)
+
+    @property
+    def active(self):
+        # Аренда протухла — остальные уже забрали наши item_id
+        return (
+            self._renewed_at is not None
+            and time.monotonic() - self._renewed_at < LEASE_TTL
+        )
+
+    def owns(self, item_id):
+        return self.active and self.ring.owner(item_id) == self.worker_id
@@ -0,0 +1,271 @@
+# stalcraft_bot/services/stalcraft_api.py
+
+import asyncio
+import math
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config import (
+    API_BASE_URL,
+    API_CREDENTIALS,
+    AUTH_URL,
+    API_REQUESTS_PER_MIN,
+    API_BURST,
+)
+from services.lot_parser import parse_lots
+from services.metrics import API_LATENCY_SECONDS, API_REQUESTS_TOTAL, STAGE_SECONDS
+from utils.rate_limiter import TokenBucket
+import httpx
+
+try:
+    import h2  # noqa: F401 — для HTTP/2 нужен пакет httpx[http2]
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE = 10
+HTTP_KEEPALIVE_EXPIRY = 30  # секунд
+AUTH_SIDELINE_SECONDS = 300  # после отказа в токене или повторного 401
+RETRY_AFTER_DEFAULT = 60  # секунд паузы после 429 без понятного Retry-After
+
+_client = None
+
+
+def init_http_client():
+    """Создаём общий клиент для всех запросов к API (вызывается из post_init)."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            timeout=3,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+    return _client
+
+
+def get_http_client():
+    return _client or init_http_client()
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+# Авторизация к API
+class ApiCredential:
+    """
+    Одно приложение EXBO: свой токен и свой бюджет запросов.
+    Токен обновляется single-flight — один запрос к AUTH_URL на всех ждущих.
+    """
+
+    REFRESH_MARGIN = 60  # секунд до истечения, когда обновляем токен
+
+    def __init__(self, client_id, client_secret):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.limiter = TokenBucket(rate=API_REQUESTS_PER_MIN / 60, burst=API_BURST)
+        self.in_flight = 0  # запросов ждут лимитер или ответ
+        self.sidelined_until = 0.0  # time.monotonic(), до которого не выбираем
+        self._token = None
+        self._expires_at = 0.0  # time.monotonic()
+        self._refresh_task = None  # текущий запрос токена, общий для всех ожидающих
+
+    def __repr__(self):
+        return f"<ApiCredential {str(self.client_id)[:6]}…>"
+
+    @property
+    def sidelined(self):
+        return time.monotonic() < self.sidelined_until
+
+    def sideline(self, seconds, reason):
+        """Временно не отдаём приложение в запросы (401/429 от API)."""
+        until = time.monotonic() + seconds
+        if until > self.sidelined_until:
+            self.sidelined_until = until
+            print(f"[INFO] {self!r} sidelined for {int(seconds)}s: {reason}")
+
+    async def get_token(self, stale=None):
+        """
+        Возвращает действующий токен. stale — токен, на который API ответил 401:
+        обновляем, только если его ещё никто не заменил.
+        """
+        if stale is not None:
+            # Другая корутина уже получила новый токен
+            if self._token and self._token != stale:
+                return self._token
+        elif self._token and time.monotonic() < self._expires_at - self.REFRESH_MARGIN:
+            return self._token
+        return await self._refresh()
+
+    async def _refresh(self):
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._request_token())
+        task = self._refresh_task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if task.done() and self._refresh_task is task:
+                self._refresh_task = None
+
+    async def _request_token(self):
+        try:
+            resp = await get_http_client().post(
+                AUTH_URL,
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                },
+            )
+            resp.raise_for_status()
+        except httpx.HTTPError as e:
+            # Без токена приложение бесполезно — пусть работают остальные
+            self.sideline(AUTH_SIDELINE_SECONDS, f"token request failed: {e}")
+            raise
+        data = resp.json()
+        self._token = data["access_token"]
+        self._expires_at = time.monotonic() + data.get("expires_in", 3600)
+        return self._token
+
+    async def refresh_loop(self):
+        # Обновляем токен заранее, чтобы опрос лотов никогда его не ждал
+        while True:
+            delay = self._expires_at - self.REFRESH_MARGIN - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self._refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ERROR] Token refresh failed for {self!r}: {e}")
+                await asyncio.sleep(10)
+
+
+class StalcraftAuth:
+    """Пул приложений из API_CREDENTIALS, запросы делятся между ними."""
+
+    credentials = [ApiCredential(*pair) for pair in API_CREDENTIALS]
+    share = 1.0  # доля лимита каждого приложения, доступная этому процессу
+    _background_tasks = []
+
+    @classmethod
+    def total_rate(cls):
+        """Бюджет пула для этого процесса, запросов в секунду."""
+        return len(cls.credentials) * API_REQUESTS_PER_MIN / 60 * cls.share
+
+    @classmethod
+    def set_share(cls, share):
+        """
+        Несколько процессов опроса с одними и теми же приложениями делят
+        их лимит: каждому достаётся share от rate и burst.
+        """
+        cls.share = share
+        for credential in cls.credentials:
+            credential.limiter.set_rate(
+                API_REQUESTS_PER_MIN / 60 * share, max(1, round(API_BURST * share))
+            )
+
+    @classmethod
+    def pick(cls):
+        """
+        Наименее загруженное приложение: меньше всего запросов в работе,
+        при равенстве — больше свободных токенов. Если отстранены все,
+        берём то, которое вернётся раньше остальных.
+        """
+        available = [c for c in cls.credentials if not c.sidelined]
+        if not available:
+            return min(cls.credentials, key=lambda c: c.sidelined_until)
+        return min(available, key=lambda c: (c.in_flight, -c.limiter.tokens))
+
+    @classmethod
+    def start_background_refresh(cls):
+        if not cls._background_tasks:
+            cls._background_tasks = [
+                asyncio.create_task(c.refresh_loop()) for c in cls.credentials
+            ]
+
+    @classmethod
+    async def stop_background_refresh(cls):
+        for task in cls._background_tasks:
+            task.cancel()
+        await asyncio.gather(*cls._background_tasks, return_exceptions=True)
+        cls._background_tasks = []
+
+
+def retry_after_seconds(value):
+    """Retry-After в секундах или HTTP-датой; непонятный — RETRY_AFTER_DEFAULT."""
+    if not value:
+        return RETRY_AFTER_DEFAULT
+    try:
+        seconds = float(value)
+    except ValueError:
+        pass
+    else:
+        # «inf»/«nan» тоже парсятся — такой паузе не верим
+        return max(0.0, seconds) if math.isfinite(seconds) else RETRY_AFTER_DEFAULT
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return RETRY_AFTER_DEFAULT
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+async def fetch_lots(item_id, limit, offset=0, sort="time_created", order="desc"):
+    """Лоты предмета (список Lot), по умолчанию новые первыми."""
+    params = {
+        "additional": "true",
+        "limit": limit,
+        "offset": offset,
+        "sort": sort,
+        "order": order,
+    }
+    url = f"{API_BASE_URL}/ru/auction/{item_id}/lots"
+    credential = StalcraftAuth.pick()
+    token = await credential.get_token()
+
+    for attempt in range(2):
+        credential.in_flight += 1
+        try:
+            await credential.limiter.acquire()
+            start = time.perf_counter()
+            resp = await get_http_client().get(
+                url, headers={"Authorization": f"Bearer {token}"}, params=params
+            )
+        except httpx.HTTPError:
+            API_REQUESTS_TOTAL.inc(status="error")
+            raise
+        finally:
+            credential.in_flight -= 1
+        elapsed = time.perf_counter() - start
+        API_LATENCY_SECONDS.observe(elapsed)
+        STAGE_SECONDS.observe(elapsed, stage="fetch")
+        API_REQUESTS_TOTAL.inc(status=resp.status_code)
+        credential.limiter.update_from_headers(resp.headers)
+        # Токен отозван или истёк раньше срока — обновляем и пробуем ещё раз
+        if resp.status_code == 401 and attempt == 0:
+            token = await credential.get_token(stale=token)
+            continue
+        break
+
+    if resp.status_code == 401:
+        # Свежий токен тоже не принят — приложение отключено или заблокировано
+        credential.sideline(AUTH_SIDELINE_SECONDS, "401")
+    elif resp.status_code == 429:
+        pause = retry_after_seconds(resp.headers.get("retry-after"))
+        credential.limiter.pause(pause)
+        credential.sideline(pause, "429")
+    resp.raise_for_status()
+    with STAGE_SECONDS.time(stage="parse"):
+        return parse_lots(resp.content)
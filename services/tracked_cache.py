@@ -0,0 +1,62 @@
+# stalcraft_bot/services/tracked_cache.py
+
+
+class TrackedItemsCache:
+    """
+    Активные фильтры (notify=True) в памяти для цикла опроса.
+    Загружается один раз, дальше обновляется из repositories.tracked_items
+    при каждой записи, так что круг опроса не читает БД.
+    """
+
+    def __init__(self):
+        self.docs = None  # _id -> документ фильтра
+        self._by_item_id = None
+
+    @property
+    def loaded(self):
+        return self.docs is not None
+
+    def load(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self._by_item_id = None
+
+    def upsert(self, doc):
+        if not self.loaded:
+            return
+        if doc.get("notify"):
+            self.docs[doc["_id"]] = doc
+        else:
+            self.docs.pop(doc["_id"], None)
+        self._by_item_id = None
+
+    def remove(self, _id):
+        if not self.loaded:
+            return
+        self.docs.pop(_id, None)
+        self._by_item_id = None
+
+    def replace_user(self, user_id, docs):
+        """Заменяем все фильтры пользователя актуальными из БД."""
+        if not self.loaded:
+            return
+        stale = [_id for _id, doc in self.docs.items() if doc["user_id"] == user_id]
+        for _id in stale:
+            del self.docs[_id]
+        for doc in docs:
+            self.upsert(doc)
+        self._by_item_id = None
+
+    def all(self):
+        return list(self.docs.values()) if self.loaded else []
+
+    def by_item_id(self):
+        # Группировку пересчитываем только после изменений
+        if self._by_item_id is None:
+            grouped = {}
+            for doc in self.all():
+                grouped.setdefault(doc["item_id"], []).append(doc)
+            self._by_item_id = grouped
+        return self._by_item_id
+
+
+tracked_cache = TrackedItemsCache()
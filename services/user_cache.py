@@ -0,0 +1,46 @@
+# stalcraft_bot/services/user_cache.py
+
+import time
+from repositories import users
+
+USER_CACHE_TTL = 30  # секунд
+
+_valid_user_ids = None
+_users = {}  # user_id -> (истекает, документ пользователя или None)
+
+
+async def get_user(user_id):
+    """Пользователь по Telegram ID с кэшем на USER_CACHE_TTL секунд."""
+    now = time.monotonic()
+    cached = _users.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    user = await users.find_by_user_id(user_id)
+    _users[user_id] = (now + USER_CACHE_TTL, user)
+    return user
+
+
+def invalidate_user(user_id=None):
+    """Сбрасываем кэш одного пользователя или всех, если user_id не известен."""
+    if user_id is None:
+        _users.clear()
+    else:
+        _users.pop(user_id, None)
+
+
+async def get_valid_user_ids():
+    """Telegram ID всех авторизованных пользователей (грузим один раз)."""
+    global _valid_user_ids
+    if _valid_user_ids is None:
+        _valid_user_ids = {
+            user_id
+            for user_id in await users.distinct_user_ids()
+            if user_id is not None
+        }
+    return _valid_user_ids
+
+
+def invalidate_valid_user_ids():
+    """Сбрасываем кэш после входа, добавления или удаления пользователя."""
+    global _valid_user_ids
+    _valid_user_ids = None
@@ -3,17 +3,21 @@
 from functools import wraps
 from telegram.ext import ContextTypes
 from telegram import Update
-from db import users_collection
+from services.user_cache import get_user
+
+# Загруженный пользователь кладётся в context.auth_user,
+# чтобы обработчик не ходил за ним в БД повторно
 
 
 def require_auth(func):
     @wraps(func)
     async def wrapper(update, context, *args, **kwargs):
         chat_id = update.effective_chat.id
-        user = users_collection.find_one({"user_id": chat_id})
+        user = await get_user(chat_id)
         if not user:
             await update.message.reply_text("Вы не авторизованы. Используйте /login.")
             return
+        context.auth_user = user
         return await func(update, context, *args, **kwargs)
 
     return wrapper
@@ -25,10 +29,11 @@ def admin_required(func):
         update: Update, context: ContextTypes.DEFAULT_TYPE, *args, **kwargs
     ):
         user_id = update.effective_user.id
-        user = users_collection.find_one({"user_id": user_id})
+        user = await get_user(user_id)
         if not user or not user.get("is_admin", False):
             await update.message.reply_text("⛔ У вас нет прав администратора.")
             return
+        context.auth_user = user
         return await func(update, context, *args, **kwargs)
 
     return wrapper
@@ -0,0 +1,81 @@
+# stalcraft_bot/utils/rate_limiter.py
+
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Асинхронный token bucket: rate токенов в секунду, не больше burst подряд.
+    Один экземпляр делится между всеми задачами, которые ходят в одно API.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: int = 1):
+        # Под локом, чтобы ожидающие получали токены по очереди (FIFO)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                else:
+                    wait = (tokens - self.tokens) / self.rate
+                await asyncio.sleep(wait)
+
+    def set_rate(self, rate: float, burst: int):
+        """Меняем лимит на лету (например, при делении бюджета между процессами)."""
+        self._refill(time.monotonic())
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = min(self.tokens, float(burst))
+
+    def pause(self, seconds: float):
+        """Не выдаём токены ближайшие seconds секунд (например, после 429)."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    def update_from_headers(self, headers):
+        """Подстраиваемся под X-RateLimit-* заголовки ответа API."""
+        remaining = _int_header(headers, "x-ratelimit-remaining")
+        if remaining is None:
+            return
+
+        now = time.monotonic()
+        self._refill(now)
+        # Сервер знает остаток лучше нас — не тратим больше, чем он разрешает
+        self.tokens = min(self.tokens, float(remaining))
+
+        if remaining <= 0:
+            reset = _int_header(headers, "x-ratelimit-reset")
+            if reset is not None:
+                # reset приходит как unix-время (в секундах или миллисекундах)
+                if reset > 10**12:
+                    reset /= 1000
+                wait = reset - time.time()
+                if 0 < wait <= 60:
+                    self.pause(wait)
+
+
+def _int_header(headers, name):
+    value = headers.get(name)
+    if value is None:
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        return None